@@ -1,16 +1,20 @@
 """FastAPI application for policy extraction"""
 
+import asyncio
 import logging
+import os
 import tempfile
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any
+from typing import BinaryIO, Dict, Any, List, Optional, Set, Tuple
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request
+from fastapi.responses import ORJSONResponse
 
 from src.extractor.pdf_processor import extract_text_from_pdf
 from src.extractor.ai_extractor import AIExtractor
 from src.extractor.schema_validator import validate_and_format
+from src.extractor.response_cache import ResponseCache
 
 # Configure logging
 logging.basicConfig(
@@ -19,12 +23,208 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Size of the chunks used to copy uploads to disk (1 MiB)
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Largest accepted request body (20 MiB)
+MAX_UPLOAD_BYTES = 20 << 20
+UPLOAD_TOO_LARGE_DETAIL = f"File too large (maximum {MAX_UPLOAD_BYTES >> 20} MiB)"
+
+# Keep uploaded PDFs on RAM-backed tmpfs when available (None = system default).
+# /dev/shm can be small (64 MB by default in Docker), so uploads that don't fit
+# fall back to the system default
+TMP_DIR = "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else None
+
+# Concurrent extractions arriving within this window are sent to OpenAI together
+BATCH_WINDOW_SECONDS = 0.1
+BATCH_MAX_SIZE = 4
+# Longer documents are extracted on their own to keep batched prompts within context limits
+BATCH_MAX_CHARS = 8000
+
 app = FastAPI(
     title="Car Insurance Policy Extraction API",
     description="Extract structured data from car insurance policy PDFs",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
+# Shared across requests so re-uploaded policies skip the OpenAI call. Opt-in, as
+# it is not size-bounded and stores policyholder details on disk
+response_cache = ResponseCache() if os.getenv("EXTRACTION_CACHE_PATH") else None
+
+
+@lru_cache(maxsize=1)
+def get_extractor() -> AIExtractor:
+    """Get the shared AI extractor, reusing its OpenAI connection pool across requests"""
+    return AIExtractor(cache=response_cache)
+
+
+# Pending (pdf_text, future) pairs waiting to be batched; created on startup
+_batch_queue: Optional["asyncio.Queue[Tuple[str, asyncio.Future]]"] = None
+_batch_tasks: Set[asyncio.Task] = set()
+# In-flight connection warm-ups, referenced so they aren't garbage collected
+_warm_up_tasks: Set[asyncio.Task] = set()
+
+
+@app.on_event("startup")
+async def start_batch_worker():
+    """Start the background task that groups concurrent extractions"""
+    global _batch_queue
+    _batch_queue = asyncio.Queue()
+    task = asyncio.create_task(_batch_worker())
+    _batch_tasks.add(task)
+    task.add_done_callback(_batch_tasks.discard)
+
+
+@app.on_event("shutdown")
+async def stop_batch_worker():
+    """Cancel the batch worker and any in-flight batches"""
+    for task in list(_batch_tasks):
+        task.cancel()
+
+
+async def _batch_worker():
+    """Collect queued extractions into batches and dispatch them"""
+    loop = asyncio.get_running_loop()
+    
+    while True:
+        batch = [await _batch_queue.get()]
+        deadline = loop.time() + BATCH_WINDOW_SECONDS
+        
+        while len(batch) < BATCH_MAX_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_batch_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        
+        # Run the batch in the background so the next one can start collecting
+        task = asyncio.create_task(_run_batch(batch))
+        _batch_tasks.add(task)
+        task.add_done_callback(_batch_tasks.discard)
+
+
+async def _run_batch(batch: List[Tuple[str, asyncio.Future]]):
+    """Extract a batch of documents and resolve the waiting requests"""
+    try:
+        extractor = get_extractor()
+        results = await asyncio.to_thread(extractor.extract_batch, [pdf_text for pdf_text, _ in batch])
+    except Exception as e:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(e)
+        return
+    
+    # Documents that failed individually fail only their own request
+    for (_, future), result in zip(batch, results):
+        if future.done():
+            continue
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+
+
+def _start_warm_up():
+    """
+    Warm up the shared extractor's connection in the background.
+    
+    Not awaited, so a slow warm-up never delays the request; failures are left to
+    the extraction step.
+    """
+    try:
+        extractor = get_extractor()
+    except Exception:
+        return
+    task = asyncio.create_task(asyncio.to_thread(extractor.warm_up))
+    _warm_up_tasks.add(task)
+    task.add_done_callback(_warm_up_tasks.discard)
+
+
+async def extract_structured_data(pdf_text: str) -> Dict[str, Any]:
+    """
+    Extract structured policy data, batching with concurrent requests where possible.
+    
+    Args:
+        pdf_text: Extracted text content from PDF
+        
+    Returns:
+        Dictionary containing extracted policy data
+    """
+    if _batch_queue is None or len(pdf_text) > BATCH_MAX_CHARS:
+        extractor = get_extractor()
+        # The OpenAI client is synchronous; keep the event loop free while it waits
+        return await asyncio.to_thread(extractor.extract, pdf_text)
+    
+    future = asyncio.get_running_loop().create_future()
+    await _batch_queue.put((pdf_text, future))
+    return await future
+
+
+def _save_upload(upload: BinaryIO, tmp_dir: Optional[str]) -> str:
+    """Copy an uploaded file to a new temporary file in tmp_dir and return its path"""
+    tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf', dir=tmp_dir)
+    try:
+        # Closing inside the try so a failure flushing the last buffered bytes
+        # (e.g. a full tmpfs) also removes the partial file
+        with tmp_file:
+            _copy_upload(upload, tmp_file)
+    except BaseException:
+        Path(tmp_file.name).unlink(missing_ok=True)
+        raise
+    return tmp_file.name
+
+
+def _copy_upload(upload: BinaryIO, tmp_file: BinaryIO):
+    """
+    Copy an upload in chunks, rejecting it once it exceeds MAX_UPLOAD_BYTES.
+    
+    The Content-Length check in limit_upload_size doesn't cover chunked uploads,
+    which have no Content-Length.
+    """
+    copied = 0
+    while chunk := upload.read(UPLOAD_CHUNK_SIZE):
+        copied += len(chunk)
+        if copied > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail=UPLOAD_TOO_LARGE_DETAIL)
+        tmp_file.write(chunk)
+
+
+def save_upload(upload: BinaryIO) -> str:
+    """
+    Save an uploaded file to a temporary file, preferring TMP_DIR.
+    
+    Args:
+        upload: Uploaded file object, positioned at the start
+        
+    Returns:
+        Path of the temporary file; the caller is responsible for deleting it
+    """
+    if TMP_DIR is None:
+        return _save_upload(upload, None)
+    
+    try:
+        return _save_upload(upload, TMP_DIR)
+    except OSError as e:
+        # Most likely the tmpfs is full; retry on disk
+        logger.warning(f"Could not save upload to {TMP_DIR} ({e}), using the default temp directory")
+        upload.seek(0)
+        return _save_upload(upload, None)
+
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """Reject oversized uploads from Content-Length before the body is read"""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES:
+        return ORJSONResponse(
+            status_code=413,
+            content={"detail": UPLOAD_TOO_LARGE_DETAIL}
+        )
+    return await call_next(request)
+
 
 @app.get("/health")
 async def health_check():
@@ -52,89 +252,96 @@ async def extract_policy(
             detail="File must be a PDF (.pdf extension required)"
         )
     
-    # Save uploaded file to temporary location
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
+    # Check the PDF signature before doing any work on the body
+    if not (await file.read(5)).startswith(b"%PDF-"):
+        raise HTTPException(
+            status_code=400,
+            detail="File is not a valid PDF (missing %PDF- header)"
+        )
+    await file.seek(0)
+    
+    # Save uploaded file to temporary location; UploadFile.file is a blocking
+    # file object, so copy it off the event loop
+    tmp_file_path = await asyncio.to_thread(save_upload, file.file)
+    
+    try:
+        logger.info(f"Processing PDF: {file.filename} ({Path(tmp_file_path).stat().st_size} bytes)")
+        
+        # Step 1: Extract text from PDF
         try:
-            # Write uploaded content to temp file
-            content = await file.read()
-            tmp_file.write(content)
-            tmp_file_path = tmp_file.name
-            
-            logger.info(f"Processing PDF: {file.filename} ({len(content)} bytes)")
-            
-            # Step 1: Extract text from PDF
-            try:
-                pdf_text = extract_text_from_pdf(tmp_file_path)
-                if not pdf_text or len(pdf_text.strip()) < 50:
-                    raise HTTPException(
-                        status_code=422,
-                        detail="Could not extract meaningful text from PDF. The file may be corrupted or image-only."
-                    )
-                logger.info(f"Extracted {len(pdf_text)} characters from PDF")
-            except Exception as e:
-                logger.error(f"Error extracting text from PDF: {e}")
+            # Open the OpenAI connection while the PDF is parsed
+            _start_warm_up()
+            pdf_text = await asyncio.to_thread(extract_text_from_pdf, tmp_file_path)
+            if not pdf_text or len(pdf_text.strip()) < 50:
                 raise HTTPException(
                     status_code=422,
-                    detail=f"Failed to extract text from PDF: {str(e)}"
-                )
-            
-            # Step 2: Extract structured data using AI
-            try:
-                extractor = AIExtractor()
-                extracted_data = extractor.extract(pdf_text)
-                logger.info("Successfully extracted data using AI")
-            except Exception as e:
-                logger.error(f"Error during AI extraction: {e}")
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"AI extraction failed: {str(e)}"
+                    detail="Could not extract meaningful text from PDF. The file may be corrupted or image-only."
                 )
+            logger.info(f"Extracted {len(pdf_text)} characters from PDF")
+        except Exception as e:
+            logger.error(f"Error extracting text from PDF: {e}")
+            raise HTTPException(
+                status_code=422,
+                detail=f"Failed to extract text from PDF: {str(e)}"
+            )
+        
+        # Step 2: Extract structured data using AI
+        try:
+            extracted_data = await extract_structured_data(pdf_text)
+            logger.info("Successfully extracted data using AI")
+        except Exception as e:
+            logger.error(f"Error during AI extraction: {e}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"AI extraction failed: {str(e)}"
+            )
+        
+        # Step 3: Validate extracted data
+        try:
+            validated_data, validation_result = validate_and_format(extracted_data)
             
-            # Step 3: Validate extracted data
-            try:
-                validated_data, validation_result = validate_and_format(extracted_data)
-                
-                response = {
-                    "success": True,
-                    "data": validated_data,
-                    "validation": {
-                        "is_valid": validation_result.is_valid,
-                        "errors": validation_result.errors,
-                        "missing_fields": validation_result.missing_fields
-                    }
+            response = {
+                "success": True,
+                "data": validated_data,
+                "validation": {
+                    "is_valid": validation_result.is_valid,
+                    "errors": validation_result.errors,
+                    "missing_fields": validation_result.missing_fields
                 }
-                
-                if not validation_result.is_valid:
-                    logger.warning(f"Validation found {len(validation_result.errors)} errors")
-                    response["warnings"] = "Extracted data has validation errors. Please review."
-                
-                return JSONResponse(content=response)
+            }
             
-            except Exception as e:
-                logger.error(f"Error during validation: {e}")
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Validation failed: {str(e)}"
-                )
+            if not validation_result.is_valid:
+                logger.warning(f"Validation found {len(validation_result.errors)} errors")
+                response["warnings"] = "Extracted data has validation errors. Please review."
+            
+            # Returning the response directly also skips FastAPI's jsonable_encoder pass
+            return ORJSONResponse(content=response)
         
-        finally:
-            # Clean up temporary file
-            try:
-                Path(tmp_file_path).unlink()
-            except Exception as e:
-                logger.warning(f"Failed to delete temp file: {e}")
+        except Exception as e:
+            logger.error(f"Error during validation: {e}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Validation failed: {str(e)}"
+            )
+    
+    finally:
+        # Clean up temporary file
+        try:
+            Path(tmp_file_path).unlink()
+        except Exception as e:
+            logger.warning(f"Failed to delete temp file: {e}")
 
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler"""
     logger.error(f"Unhandled exception: {exc}", exc_info=True)
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "success": False,
             "error": "Internal server error",
-            "detail": str(exc) if logger.level == logging.DEBUG else "An unexpected error occurred"
+            "detail": str(exc) if logger.isEnabledFor(logging.DEBUG) else "An unexpected error occurred"
         }
     )
 
@@ -0,0 +1,326 @@
+"""Validator generated from validator.json by codegen.py; do not edit by hand.
+
+Regenerate with: python -m src.extractor.codegen
+"""
+
+from typing import Any, List
+
+
+def validate(data: Any) -> List[str]:
+    """Return the schema violations in data as "path: message" strings"""
+    errors = []
+    if not (isinstance(data, dict)):
+        errors.append('root: must be object')
+    else:
+        _validate_root(data, errors)
+    return errors
+
+
+def _validate_root(value, errors):
+    if 'policyholder' not in value:
+        errors.append('policyholder: is required')
+    else:
+        field = value['policyholder']
+        if not (isinstance(field, dict)):
+            errors.append('policyholder: must be object')
+        else:
+            _validate_policyholder(field, errors)
+    if 'vehicle' not in value:
+        errors.append('vehicle: is required')
+    else:
+        field = value['vehicle']
+        if not (isinstance(field, dict)):
+            errors.append('vehicle: must be object')
+        else:
+            _validate_vehicle(field, errors)
+    if 'coverage' not in value:
+        errors.append('coverage: is required')
+    else:
+        field = value['coverage']
+        if not (isinstance(field, dict)):
+            errors.append('coverage: must be object')
+        else:
+            _validate_coverage(field, errors)
+    if 'premiumAndDiscounts' not in value:
+        errors.append('premiumAndDiscounts: is required')
+    else:
+        field = value['premiumAndDiscounts']
+        if not (isinstance(field, dict)):
+            errors.append('premiumAndDiscounts: must be object')
+        else:
+            _validate_premiumAndDiscounts(field, errors)
+    if 'insurerAndPolicyDetails' not in value:
+        errors.append('insurerAndPolicyDetails: is required')
+    else:
+        field = value['insurerAndPolicyDetails']
+        if not (isinstance(field, dict)):
+            errors.append('insurerAndPolicyDetails: must be object')
+        else:
+            _validate_insurerAndPolicyDetails(field, errors)
+    if 'additionalEndorsements' in value:
+        field = value['additionalEndorsements']
+        if not (isinstance(field, dict)):
+            errors.append('additionalEndorsements: must be object')
+        else:
+            _validate_additionalEndorsements(field, errors)
+
+
+def _validate_policyholder(value, errors):
+    if 'name' not in value:
+        errors.append('policyholder -> name: is required')
+    else:
+        field = value['name']
+        if not (isinstance(field, str)):
+            errors.append('policyholder -> name: must be string')
+    if 'address' not in value:
+        errors.append('policyholder -> address: is required')
+    else:
+        field = value['address']
+        if not (isinstance(field, str)):
+            errors.append('policyholder -> address: must be string')
+    if 'occupation' not in value:
+        errors.append('policyholder -> occupation: is required')
+    else:
+        field = value['occupation']
+        if not (isinstance(field, str)):
+            errors.append('policyholder -> occupation: must be string')
+    if 'namedDrivers' in value:
+        field = value['namedDrivers']
+        if not (isinstance(field, list)):
+            errors.append('policyholder -> namedDrivers: must be array')
+        else:
+            for index, item in enumerate(field):
+                if not (isinstance(item, str)):
+                    errors.append(f"policyholder -> namedDrivers -> {index}: must be string")
+
+
+def _validate_vehicle(value, errors):
+    if 'registrationMark' not in value:
+        errors.append('vehicle -> registrationMark: is required')
+    else:
+        field = value['registrationMark']
+        if not (isinstance(field, str)):
+            errors.append('vehicle -> registrationMark: must be string')
+    if 'makeAndModel' not in value:
+        errors.append('vehicle -> makeAndModel: is required')
+    else:
+        field = value['makeAndModel']
+        if not (isinstance(field, str)):
+            errors.append('vehicle -> makeAndModel: must be string')
+    if 'yearOfManufacture' not in value:
+        errors.append('vehicle -> yearOfManufacture: is required')
+    else:
+        field = value['yearOfManufacture']
+        if not (isinstance(field, int) and not isinstance(field, bool) or isinstance(field, float) and field.is_integer()):
+            errors.append('vehicle -> yearOfManufacture: must be integer')
+    if 'chassisNumber' not in value:
+        errors.append('vehicle -> chassisNumber: is required')
+    else:
+        field = value['chassisNumber']
+        if not (isinstance(field, str)):
+            errors.append('vehicle -> chassisNumber: must be string')
+    if 'engineNumber' in value:
+        field = value['engineNumber']
+        if not (isinstance(field, str)):
+            errors.append('vehicle -> engineNumber: must be string')
+    if 'cubicCapacity' in value:
+        field = value['cubicCapacity']
+        if not (isinstance(field, (int, float)) and not isinstance(field, bool)):
+            errors.append('vehicle -> cubicCapacity: must be number')
+    if 'seatingCapacity' not in value:
+        errors.append('vehicle -> seatingCapacity: is required')
+    else:
+        field = value['seatingCapacity']
+        if not (isinstance(field, int) and not isinstance(field, bool) or isinstance(field, float) and field.is_integer()):
+            errors.append('vehicle -> seatingCapacity: must be integer')
+    if 'bodyType' not in value:
+        errors.append('vehicle -> bodyType: is required')
+    else:
+        field = value['bodyType']
+        if not (isinstance(field, str)):
+            errors.append('vehicle -> bodyType: must be string')
+    if 'estimatedValue' in value:
+        field = value['estimatedValue']
+        if not (isinstance(field, (int, float)) and not isinstance(field, bool)):
+            errors.append('vehicle -> estimatedValue: must be number')
+
+
+def _validate_coverage(value, errors):
+    if 'typeOfCover' not in value:
+        errors.append('coverage -> typeOfCover: is required')
+    else:
+        field = value['typeOfCover']
+        if not (isinstance(field, str)):
+            errors.append('coverage -> typeOfCover: must be string')
+    if 'liabilityLimits' not in value:
+        errors.append('coverage -> liabilityLimits: is required')
+    else:
+        field = value['liabilityLimits']
+        if not (isinstance(field, dict)):
+            errors.append('coverage -> liabilityLimits: must be object')
+        else:
+            _validate_coverage_liabilityLimits(field, errors)
+    if 'excess' not in value:
+        errors.append('coverage -> excess: is required')
+    else:
+        field = value['excess']
+        if not (isinstance(field, dict)):
+            errors.append('coverage -> excess: must be object')
+        else:
+            _validate_coverage_excess(field, errors)
+    if 'limitationsOnUse' not in value:
+        errors.append('coverage -> limitationsOnUse: is required')
+    else:
+        field = value['limitationsOnUse']
+        if not (isinstance(field, dict)):
+            errors.append('coverage -> limitationsOnUse: must be object')
+        else:
+            _validate_coverage_limitationsOnUse(field, errors)
+    if 'authorizedDrivers' not in value:
+        errors.append('coverage -> authorizedDrivers: is required')
+    else:
+        field = value['authorizedDrivers']
+        if not (isinstance(field, str)):
+            errors.append('coverage -> authorizedDrivers: must be string')
+
+
+def _validate_coverage_liabilityLimits(value, errors):
+    if 'bodilyInjury' not in value:
+        errors.append('coverage -> liabilityLimits -> bodilyInjury: is required')
+    else:
+        field = value['bodilyInjury']
+        if not (isinstance(field, (int, float)) and not isinstance(field, bool)):
+            errors.append('coverage -> liabilityLimits -> bodilyInjury: must be number')
+    if 'propertyDamage' not in value:
+        errors.append('coverage -> liabilityLimits -> propertyDamage: is required')
+    else:
+        field = value['propertyDamage']
+        if not (isinstance(field, (int, float)) and not isinstance(field, bool)):
+            errors.append('coverage -> liabilityLimits -> propertyDamage: must be number')
+
+
+def _validate_coverage_excess(value, errors):
+    if 'thirdPartyProperty' in value:
+        field = value['thirdPartyProperty']
+        if not (isinstance(field, (int, float)) and not isinstance(field, bool)):
+            errors.append('coverage -> excess -> thirdPartyProperty: must be number')
+    if 'youngDriver' in value:
+        field = value['youngDriver']
+        if not (isinstance(field, (int, float)) and not isinstance(field, bool)):
+            errors.append('coverage -> excess -> youngDriver: must be number')
+    if 'inexperiencedDriver' in value:
+        field = value['inexperiencedDriver']
+        if not (isinstance(field, (int, float)) and not isinstance(field, bool)):
+            errors.append('coverage -> excess -> inexperiencedDriver: must be number')
+    if 'unnamedDriver' in value:
+        field = value['unnamedDriver']
+        if not (isinstance(field, (int, float)) and not isinstance(field, bool)):
+            errors.append('coverage -> excess -> unnamedDriver: must be number')
+
+
+def _validate_coverage_limitationsOnUse(value, errors):
+    if 'details' not in value:
+        errors.append('coverage -> limitationsOnUse -> details: is required')
+    else:
+        field = value['details']
+        if not (isinstance(field, list)):
+            errors.append('coverage -> limitationsOnUse -> details: must be array')
+        else:
+            for index, item in enumerate(field):
+                if not (isinstance(item, str)):
+                    errors.append(f"coverage -> limitationsOnUse -> details -> {index}: must be string")
+
+
+def _validate_premiumAndDiscounts(value, errors):
+    if 'premiumAmount' not in value:
+        errors.append('premiumAndDiscounts -> premiumAmount: is required')
+    else:
+        field = value['premiumAmount']
+        if not (isinstance(field, (int, float)) and not isinstance(field, bool)):
+            errors.append('premiumAndDiscounts -> premiumAmount: must be number')
+    if 'totalPayable' not in value:
+        errors.append('premiumAndDiscounts -> totalPayable: is required')
+    else:
+        field = value['totalPayable']
+        if not (isinstance(field, (int, float)) and not isinstance(field, bool)):
+            errors.append('premiumAndDiscounts -> totalPayable: must be number')
+    if 'noClaimDiscount' not in value:
+        errors.append('premiumAndDiscounts -> noClaimDiscount: is required')
+    else:
+        field = value['noClaimDiscount']
+        if not (isinstance(field, (int, float)) and not isinstance(field, bool)):
+            errors.append('premiumAndDiscounts -> noClaimDiscount: must be number')
+    if 'levies' in value:
+        field = value['levies']
+        if not (isinstance(field, dict)):
+            errors.append('premiumAndDiscounts -> levies: must be object')
+        else:
+            _validate_premiumAndDiscounts_levies(field, errors)
+
+
+def _validate_premiumAndDiscounts_levies(value, errors):
+    if 'mib' in value:
+        field = value['mib']
+        if not (isinstance(field, (int, float)) and not isinstance(field, bool)):
+            errors.append('premiumAndDiscounts -> levies -> mib: must be number')
+    if 'ia' in value:
+        field = value['ia']
+        if not ((isinstance(field, (int, float)) and not isinstance(field, bool)) or (isinstance(field, str))):
+            errors.append('premiumAndDiscounts -> levies -> ia: must be number or string')
+
+
+def _validate_insurerAndPolicyDetails(value, errors):
+    if 'insurerName' not in value:
+        errors.append('insurerAndPolicyDetails -> insurerName: is required')
+    else:
+        field = value['insurerName']
+        if not (isinstance(field, str)):
+            errors.append('insurerAndPolicyDetails -> insurerName: must be string')
+    if 'policyNumber' not in value:
+        errors.append('insurerAndPolicyDetails -> policyNumber: is required')
+    else:
+        field = value['policyNumber']
+        if not (isinstance(field, str)):
+            errors.append('insurerAndPolicyDetails -> policyNumber: must be string')
+    if 'periodOfInsurance' not in value:
+        errors.append('insurerAndPolicyDetails -> periodOfInsurance: is required')
+    else:
+        field = value['periodOfInsurance']
+        if not (isinstance(field, dict)):
+            errors.append('insurerAndPolicyDetails -> periodOfInsurance: must be object')
+        else:
+            _validate_insurerAndPolicyDetails_periodOfInsurance(field, errors)
+    if 'dateOfIssue' in value:
+        field = value['dateOfIssue']
+        if not (isinstance(field, str)):
+            errors.append('insurerAndPolicyDetails -> dateOfIssue: must be string')
+
+
+def _validate_insurerAndPolicyDetails_periodOfInsurance(value, errors):
+    if 'start' not in value:
+        errors.append('insurerAndPolicyDetails -> periodOfInsurance -> start: is required')
+    else:
+        field = value['start']
+        if not (isinstance(field, str)):
+            errors.append('insurerAndPolicyDetails -> periodOfInsurance -> start: must be string')
+    if 'end' not in value:
+        errors.append('insurerAndPolicyDetails -> periodOfInsurance -> end: is required')
+    else:
+        field = value['end']
+        if not (isinstance(field, str)):
+            errors.append('insurerAndPolicyDetails -> periodOfInsurance -> end: must be string')
+
+
+def _validate_additionalEndorsements(value, errors):
+    if 'endorsements' in value:
+        field = value['endorsements']
+        if not (isinstance(field, list)):
+            errors.append('additionalEndorsements -> endorsements: must be array')
+        else:
+            for index, item in enumerate(field):
+                if not (isinstance(item, str)):
+                    errors.append(f"additionalEndorsements -> endorsements -> {index}: must be string")
+    if 'hirePurchaseMortgagee' in value:
+        field = value['hirePurchaseMortgagee']
+        if not (isinstance(field, str)):
+            errors.append('additionalEndorsements -> hirePurchaseMortgagee: must be string')
@@ -1,34 +1,267 @@
 """OpenAI-based extraction of structured policy data from PDF text"""
 
+import hashlib
 import json
 import logging
 import os
-from typing import Dict, Any, Optional
+import re
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Union
+import tiktoken
 from openai import OpenAI
 from dotenv import load_dotenv
 
+from src.extractor.response_cache import ResponseCache
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Resolved once at import; AIExtractor falls back to it when no key is given
+_API_KEY = os.getenv("OPENAI_API_KEY")
+
+# Detection patterns for the per-document prompt notes
+_CJK_RE = re.compile(r"[\u4e00-\u9fff]")
+_REDACTION_RE = re.compile(r"REDACTED|\*\*\*|BLACKED|MASKED|████", re.IGNORECASE)
+
+# Maximum size of the document text sent to the model; about the 20000 characters
+# of English text that were sent before the budget was counted in tokens
+MAX_DOCUMENT_TOKENS = 5000
+# Chinese text needs several times more tokens for the same content, so documents
+# containing it keep a larger budget
+MAX_CJK_DOCUMENT_TOKENS = 12000
+# Character budget used when the tokenizer cannot be loaded
+MAX_DOCUMENT_CHARS = 20000
+# Cap on generated tokens per document; bounds decode time, which dominates latency
+MAX_OUTPUT_TOKENS_PER_DOCUMENT = 1500
+
+# Part of the response cache key; bump when a change to prompt preparation or
+# response normalization alters extraction results
+RESPONSE_FORMAT_VERSION = 1
+
+# How long an idle pooled connection is assumed to stay open (httpx keep-alive expiry)
+CONNECTION_KEEPALIVE_SECONDS = 5.0
+
+
+# Loaded tokenizers by model, and when loading last failed (encodings are
+# downloaded on first use, so a failure may be a transient network error)
+_encodings: Dict[str, "tiktoken.Encoding"] = {}
+_encoding_failures: Dict[str, float] = {}
+ENCODING_RETRY_SECONDS = 60.0
+
+
+def _get_encoding(model: str) -> Optional["tiktoken.Encoding"]:
+    """Get the tokenizer for a model, or None if it cannot be loaded (retried after a while)"""
+    encoding = _encodings.get(model)
+    if encoding is not None:
+        return encoding
+    
+    if time.monotonic() - _encoding_failures.get(model, -ENCODING_RETRY_SECONDS) < ENCODING_RETRY_SECONDS:
+        return None
+    
+    try:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            # Unknown model name: use the encoding of current OpenAI models
+            encoding = tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"Could not load tokenizer for {model}: {e}")
+        _encoding_failures[model] = time.monotonic()
+        return None
+    
+    _encodings[model] = encoding
+    return encoding
+
+
+# Coercion of extracted values by field name. Each coercer returns None for
+# values that cannot be interpreted.
+_NUM_CLEAN_RE = re.compile(r"[$,]|HKD")
+
+_ARRAY_FIELDS = frozenset({"namedDrivers", "endorsements", "details"})
+_INT_FIELDS = frozenset({"yearOfManufacture", "seatingCapacity"})
+_NUMERIC_FIELDS = frozenset({
+    "premiumAmount", "totalPayable", "noClaimDiscount", "bodilyInjury",
+    "propertyDamage", "cubicCapacity", "estimatedValue", "mib",
+    "thirdPartyProperty", "youngDriver", "inexperiencedDriver", "unnamedDriver"
+})
+# Required string fields that should never be None
+_REQUIRED_STRING_FIELDS = frozenset({
+    "name", "address", "occupation", "registrationMark", "makeAndModel",
+    "chassisNumber", "bodyType", "typeOfCover", "limitationsOnUse",
+    "authorizedDrivers", "insurerName", "policyNumber"
+})
+# Placeholder values kept (uppercased) for required string fields
+_PLACEHOLDER_VALUES = frozenset({"N/A", "UNKNOWN", "REDACTED"})
+# Fields that are objects in the schema; any other value (e.g. "REDACTED" for a
+# whole section) is dropped so the section is filled with defaults
+_OBJECT_FIELDS = frozenset({
+    "policyholder", "vehicle", "coverage", "liabilityLimits", "excess",
+    "premiumAndDiscounts", "levies", "insurerAndPolicyDetails",
+    "periodOfInsurance", "additionalEndorsements"
+})
+
+
+def _as_text(value: Any) -> str:
+    """Render a scalar or list value as a stripped string"""
+    if isinstance(value, list):
+        value = ", ".join(str(v) for v in value)
+    return str(value).strip()
+
+
+def _coerce_array(value: Any) -> List[str]:
+    """Parse an array of strings, tolerating a comma-separated string"""
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if v is not None and str(v).strip()]
+    value = str(value)
+    if value and value != "N/A" and "UNKNOWN - standard" not in value:
+        return [v.strip() for v in value.split(',') if v.strip()]
+    if value and "UNKNOWN - standard" in value:
+        return [value]  # Keep the unknown message as a single item
+    return []
+
+
+def _coerce_int(value: Any) -> Optional[int]:
+    """Parse an integer"""
+    try:
+        value = value if isinstance(value, (int, float)) else _as_text(value)
+        return int(value) if value != "N/A" else None
+    except (ValueError, TypeError):
+        return None
+
+
+def _coerce_number(value: Any) -> Optional[float]:
+    """Parse a monetary or numeric value, stripping currency symbols and commas"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    cleaned = _NUM_CLEAN_RE.sub("", _as_text(value)).strip()
+    if not cleaned or cleaned == "N/A":
+        return None
+    try:
+        return float(cleaned) if '.' in cleaned else int(cleaned)
+    except ValueError:
+        return None
+
+
+def _coerce_levy(value: Any) -> Any:
+    """Parse a levy that can be a number or 'INCLUDED'"""
+    if isinstance(value, str) and value.strip().upper() == "INCLUDED":
+        return value
+    return _coerce_number(value)
+
+
+def _coerce_required_string(value: Any) -> Optional[str]:
+    """Parse a required string, normalizing 'N/A', 'UNKNOWN' and 'REDACTED'"""
+    value = _as_text(value)
+    if not value:
+        return None
+    if value.upper() in _PLACEHOLDER_VALUES:
+        return value.upper()
+    return value  # Includes full "UNKNOWN - ..." or "REDACTED" messages
+
+
+def _coerce_optional_string(value: Any) -> Optional[str]:
+    """Parse an optional string ('N/A' means not present)"""
+    value = _as_text(value)
+    return value if value and value != "N/A" else None
+
+
+_FIELD_COERCERS: Dict[str, Callable[[Any], Any]] = {
+    **dict.fromkeys(_ARRAY_FIELDS, _coerce_array),
+    **dict.fromkeys(_INT_FIELDS, _coerce_int),
+    **dict.fromkeys(_NUMERIC_FIELDS, _coerce_number),
+    "ia": _coerce_levy,
+    **dict.fromkeys(_REQUIRED_STRING_FIELDS, _coerce_required_string),
+}
+
+# Default values for required fields, used when they are not extracted.
+# Kept as serialized JSON since json.loads is a cheap way to get a fresh copy.
+_DEFAULT_POLICY_DATA_JSON = json.dumps({
+    "policyholder": {
+        "name": "UNKNOWN",
+        "address": "UNKNOWN",
+        "occupation": "UNKNOWN"
+    },
+    "vehicle": {
+        "registrationMark": "UNKNOWN",
+        "makeAndModel": "UNKNOWN",
+        "yearOfManufacture": 0,  # Default integer for required field
+        "chassisNumber": "UNKNOWN",
+        "seatingCapacity": 0,  # Default integer for required field
+        "bodyType": "UNKNOWN"
+    },
+    "coverage": {
+        "typeOfCover": "UNKNOWN",
+        "limitationsOnUse": {
+            "details": ["UNKNOWN - standard usage restrictions apply"]
+        },
+        "authorizedDrivers": "UNKNOWN - standard driver authorization applies",
+        "liabilityLimits": {
+            "bodilyInjury": 0,
+            "propertyDamage": 0
+        },
+        "excess": {}
+    },
+    "premiumAndDiscounts": {
+        "premiumAmount": 0.0,
+        "totalPayable": 0.0,
+        "noClaimDiscount": 0.0
+    },
+    "insurerAndPolicyDetails": {
+        "insurerName": "UNKNOWN",
+        "policyNumber": "UNKNOWN",
+        "periodOfInsurance": {
+            "start": "UNKNOWN",
+            "end": "UNKNOWN"
+        }
+    }
+})
+
+
+@lru_cache(maxsize=4)
+def _get_client(api_key: str) -> OpenAI:
+    """Get a shared OpenAI client (and connection pool) for an API key"""
+    return OpenAI(api_key=api_key)
+
+
+def _overlay(base: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
+    """Recursively overlay data onto base (in place) and return base, keeping objects in base that data has non-objects for"""
+    for key, value in data.items():
+        if isinstance(base.get(key), dict):
+            if isinstance(value, dict):
+                _overlay(base[key], value)
+        else:
+            base[key] = value
+    return base
+
 
 class AIExtractor:
     """Extracts structured policy data from PDF text using OpenAI"""
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o"):
+    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o",
+                 cache: Optional[ResponseCache] = None):
         """
         Initialize the AI extractor.
         
         Args:
             api_key: OpenAI API key (defaults to OPENAI_API_KEY env var)
             model: OpenAI model to use (default: gpt-4o)
+            cache: Cache of previous extraction results (default: no caching)
         """
-        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.api_key = api_key or _API_KEY
         if not self.api_key:
             raise ValueError("OpenAI API key not provided. Set OPENAI_API_KEY environment variable.")
         
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = _get_client(self.api_key)
         self.model = model
+        self.cache = cache
+        self._prompt_cache_key = hashlib.sha1(
+            f"{model}:{self._get_system_prompt()}".encode()
+        ).hexdigest()
+        self._last_request_time = float("-inf")
     
     def extract(self, pdf_text: str) -> Dict[str, Any]:
         """
@@ -40,30 +273,22 @@ class AIExtractor:
         Returns:
             Dictionary containing extracted policy data
         """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(pdf_text)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.info("Using cached extraction result")
+                return cached
+        
         prompt = self._build_extraction_prompt(pdf_text)
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": self._get_system_prompt()
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.1  # Low temperature for consistent extraction
-            )
-            
-            response_text = response.choices[0].message.content
-            if not response_text:
-                raise ValueError("Empty response from OpenAI API")
+            response_text = self._complete(prompt)
+            extracted_data = self._parse_json_response(response_text)
             
-            # Parse key-value pairs from the response and construct JSON
-            extracted_data = self._parse_key_value_pairs(response_text)
+            if cache_key is not None:
+                self.cache.set(cache_key, extracted_data)
             
             logger.info("Successfully extracted policy data from PDF")
             return extracted_data
@@ -72,17 +297,174 @@ class AIExtractor:
             logger.error(f"Error during AI extraction: {e}")
             raise
     
+    def extract_batch(self, pdf_texts: List[str]) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Extract structured policy data from several documents in a single request.
+        
+        Sharing one request amortizes the system prompt across the documents. If the
+        batched response cannot be matched back to the documents, each one is
+        extracted individually instead, so a failing document doesn't fail the others.
+        
+        Args:
+            pdf_texts: Extracted text content of each PDF
+            
+        Returns:
+            List with, in input order, the dictionary of extracted policy data for each
+            document, or the exception raised while extracting it
+        """
+        results: List[Optional[Union[Dict[str, Any], Exception]]] = [None] * len(pdf_texts)
+        cache_keys: List[Optional[str]] = [None] * len(pdf_texts)
+        
+        if self.cache is not None:
+            for i, pdf_text in enumerate(pdf_texts):
+                cache_keys[i] = self._cache_key(pdf_text)
+                results[i] = self.cache.get(cache_keys[i])
+        
+        pending = [i for i, result in enumerate(results) if result is None]
+        if len(pending) > 1:
+            prompt = self._build_batch_extraction_prompt([pdf_texts[i] for i in pending])
+            
+            try:
+                documents = self._match_batch_documents(self._complete(prompt, len(pending)), len(pending))
+                
+                for i, document in zip(pending, documents):
+                    results[i] = self._normalize_policy_data(document)
+                    if cache_keys[i] is not None:
+                        self.cache.set(cache_keys[i], results[i])
+                
+                logger.info(f"Successfully extracted policy data from {len(pending)} PDFs in one request")
+            
+            except Exception as e:
+                logger.warning(f"Batched extraction failed ({e}), extracting documents individually")
+        
+        for i in pending:
+            if results[i] is None:
+                try:
+                    results[i] = self.extract(pdf_texts[i])
+                except Exception as e:
+                    results[i] = e
+        
+        return results
+    
+    def _cache_key(self, pdf_text: str) -> str:
+        """Build the response cache key for a document"""
+        # The truncation budgets change what is sent for long documents
+        version = f"{RESPONSE_FORMAT_VERSION}:{MAX_DOCUMENT_TOKENS}:{MAX_CJK_DOCUMENT_TOKENS}:{MAX_DOCUMENT_CHARS}"
+        return ResponseCache.make_key(pdf_text, self.model, self._get_system_prompt(), version)
+    
+    def _match_batch_documents(self, response_text: str, document_count: int) -> List[Dict[str, Any]]:
+        """
+        Match the entries of a batched response back to the documents in the prompt.
+        
+        Entries are matched by the document number they echo rather than by their
+        position, so a reordered reply can't hand one document's data to another.
+        
+        Args:
+            response_text: Batched response from the model
+            document_count: Number of documents in the prompt
+            
+        Returns:
+            Policy data for each document, in prompt order
+            
+        Raises:
+            ValueError: If every document number does not appear exactly once
+        """
+        entries = json.loads(response_text).get("documents")
+        if not isinstance(entries, list) or len(entries) != document_count:
+            raise ValueError("Batched response does not contain one entry per document")
+        
+        documents: Dict[int, Dict[str, Any]] = {}
+        for entry in entries:
+            if not isinstance(entry, dict) or not isinstance(entry.get("data"), dict):
+                raise ValueError("Batched response entry is not a JSON object with a data object")
+            
+            number = entry.get("document")
+            if isinstance(number, bool) or not isinstance(number, int) or not 1 <= number <= document_count:
+                raise ValueError(f"Batched response entry has an invalid document number: {number!r}")
+            if number in documents:
+                raise ValueError(f"Batched response contains document {number} more than once")
+            documents[number] = entry["data"]
+        
+        return [documents[number] for number in range(1, document_count + 1)]
+    
+    def warm_up(self):
+        """
+        Open a connection to the OpenAI API ahead of an extraction request.
+        
+        Meant to run while the PDF is being parsed so that DNS/TLS setup is not
+        on the critical path. Skipped if the pooled connection is likely still
+        alive, and never raises.
+        """
+        if time.monotonic() - self._last_request_time < CONNECTION_KEEPALIVE_SECONDS:
+            return
+        
+        try:
+            self.client.with_options(max_retries=0, timeout=5.0).models.list()
+            self._last_request_time = time.monotonic()
+        except Exception as e:
+            logger.debug(f"OpenAI connection warm-up failed: {e}")
+    
+    def _complete(self, prompt: str, document_count: int = 1) -> str:
+        """
+        Send an extraction prompt to OpenAI and return the response text.
+        
+        Args:
+            prompt: User prompt containing the document text
+            document_count: Number of documents in the prompt
+            
+        Returns:
+            Raw response text (a JSON object)
+        """
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": self._get_system_prompt()
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            temperature=0.1,  # Low temperature for consistent extraction
+            max_tokens=MAX_OUTPUT_TOKENS_PER_DOCUMENT * document_count,
+            response_format={"type": "json_object"},
+            # Route requests sharing the system prompt to the same prompt cache
+            extra_body={"prompt_cache_key": self._prompt_cache_key}
+        )
+        self._last_request_time = time.monotonic()
+        
+        choice = response.choices[0]
+        if choice.finish_reason == "length":
+            raise ValueError("OpenAI response was truncated at the output token limit")
+        
+        response_text = choice.message.content
+        if not response_text:
+            raise ValueError("Empty response from OpenAI API")
+        
+        return response_text
+    
     def _get_system_prompt(self) -> str:
         """Get the system prompt for extraction"""
         return """You are an expert at extracting structured information from car insurance policy documents.
-Your task is to extract all relevant information from the provided policy document text and return it as KEY-VALUE PAIRS.
-
-Return the extracted data in the following format, one key-value pair per line:
-KEY: value
+Your task is to extract all relevant information from the provided policy document text and return it as a single JSON object.
 
-For nested objects, use dot notation (e.g., "policyholder.name: John Doe", "coverage.liabilityLimits.bodilyInjury: 100000000")
-
-For arrays, use comma-separated values (e.g., "policyholder.namedDrivers: Driver1, Driver2")
+Return the extracted data as JSON with the following structure (fields are referred to below by their dotted path, e.g. "policyholder.name"):
+{
+  "policyholder": {"name": string, "address": string, "occupation": string, "namedDrivers": [string]},
+  "vehicle": {"registrationMark": string, "makeAndModel": string, "yearOfManufacture": integer, "chassisNumber": string, "engineNumber": string, "cubicCapacity": number, "seatingCapacity": integer, "bodyType": string, "estimatedValue": number},
+  "coverage": {
+    "typeOfCover": string,
+    "liabilityLimits": {"bodilyInjury": number, "propertyDamage": number},
+    "excess": {"thirdPartyProperty": number, "youngDriver": number, "inexperiencedDriver": number, "unnamedDriver": number},
+    "limitationsOnUse": {"details": [string]},
+    "authorizedDrivers": string
+  },
+  "premiumAndDiscounts": {"premiumAmount": number, "totalPayable": number, "noClaimDiscount": number, "levies": {"mib": number, "ia": number or "INCLUDED"}},
+  "insurerAndPolicyDetails": {"insurerName": string, "policyNumber": string, "periodOfInsurance": {"start": string, "end": string}, "dateOfIssue": string},
+  "additionalEndorsements": {"endorsements": [string], "hirePurchaseMortgagee": string}
+}
 
 CRITICAL - Required fields that MUST be extracted (use "UNKNOWN" if truly not found):
 - policyholder.name, policyholder.address, policyholder.occupation, policyholder.namedDrivers (optional)
@@ -90,7 +472,7 @@ CRITICAL - Required fields that MUST be extracted (use "UNKNOWN" if truly not fo
 - coverage.typeOfCover, coverage.liabilityLimits.bodilyInjury, coverage.liabilityLimits.propertyDamage, coverage.excess.thirdPartyProperty (optional), coverage.excess.youngDriver (optional), coverage.excess.inexperiencedDriver (optional), coverage.excess.unnamedDriver (optional), coverage.limitationsOnUse.details, coverage.authorizedDrivers
 - premiumAndDiscounts.premiumAmount, premiumAndDiscounts.totalPayable, premiumAndDiscounts.noClaimDiscount (as number, e.g., 60 for 60%), premiumAndDiscounts.levies.mib (optional), premiumAndDiscounts.levies.ia (optional)
 - insurerAndPolicyDetails.insurerName, insurerAndPolicyDetails.policyNumber, insurerAndPolicyDetails.periodOfInsurance.start, insurerAndPolicyDetails.periodOfInsurance.end, insurerAndPolicyDetails.dateOfIssue (optional)
-- additionalEndorsements.endorsements (optional, comma-separated), additionalEndorsements.hirePurchaseMortgagee (optional)
+- additionalEndorsements.endorsements (optional, list), additionalEndorsements.hirePurchaseMortgagee (optional)
 
 SPECIAL INSTRUCTIONS FOR CRITICAL FIELDS:
 
@@ -102,7 +484,7 @@ SPECIAL INSTRUCTIONS FOR CRITICAL FIELDS:
    - "POLICY LIABILITY LIMITS ANY ONE EVENT" (or similar headers)
    - "Terms of cover"
    CRITICAL: Do NOT extract the header itself. Extract the lines of text immediately FOLLOWING these headers (often limits, e.g., "Third Party Death...", "Third party Property...").
-   Extract these lines into "coverage.limitationsOnUse.details" as a comma-separated list (val1, val2). 
+   Extract these lines into "coverage.limitationsOnUse.details" as a JSON array of strings. 
    If you find ANY text about usage or limits, extract it. If truly not found, use "UNKNOWN - standard usage restrictions apply"
 
 2. coverage.authorizedDrivers: This is ALWAYS present. Look for phrases like:
@@ -134,25 +516,58 @@ HANDLING MULTILINGUAL DOCUMENTS:
 Important guidelines:
 1. Extract all available information accurately - search the ENTIRE document thoroughly
 2. For required string fields (limitationsOnUse, authorizedDrivers, insurerName, etc.), if not found, use "UNKNOWN" (not null, not empty). If REDACTED, use "REDACTED"
-3. For optional fields that are missing, omit that line (don't include it). If REDACTED, include it with value "REDACTED"
+3. For optional fields that are missing, omit that key (don't include it). If REDACTED, include it with value "REDACTED"
 4. Dates should be in DD/MM/YYYY format
 5. Monetary values should be numbers only (not strings with currency symbols)
 6. Percentages should be numbers (e.g., 60 for 60%, not "60%")
-7. Return ONLY the key-value pairs, one per line, no additional text or explanation
+7. Return ONLY the JSON object, no additional text or explanation
 8. Use the exact key names as specified above
 9. Be thorough - read through ALL pages and sections of the document
-10. If you see blacked-out sections, masked text, or "[REDACTED]" markers, explicitly use "REDACTED" as the value"""
+10. If you see blacked-out sections, masked text, or "[REDACTED]" markers, explicitly use "REDACTED" as the value
+
+CRITICAL INSTRUCTIONS:
+1. Read through the ENTIRE document text carefully - information may be on any page
+2. Search for ALL required fields listed above
+3. For coverage.limitationsOnUse: Check under "POLICY LIABILITY LIMITS ANY ONE EVENT" or "Terms of cover". Extract the content *following* the header.
+4. For coverage.authorizedDrivers: Look for "Authorized Drivers" or "Named driver(s)". Extract the *names* listed, not the header title.
+5. For insurerAndPolicyDetails.insurerName: Search headers, footers, company logos, and all pages. The insurer name is always present somewhere in the document.
+6. For vehicle and policyholder details: Check tables, schedules, and structured sections throughout the document.
+7. For premium information: Look for premium tables, payment summaries, or financial sections.
+8. If you encounter REDACTED, BLACKED OUT, or MASKED fields (showing as ***, [REDACTED], black boxes, etc.), use "REDACTED" as the value - do NOT try to guess or infer the value.
+9. If the document contains Chinese text, extract information from both English and Chinese sections. Look for bilingual labels.
+
+Return all extracted information as a JSON object as described above.
+For required fields that cannot be found, use "UNKNOWN" (not null, not empty) to ensure the data structure is complete.
+For fields that are REDACTED, use "REDACTED" as the value."""
 
     def _build_extraction_prompt(self, pdf_text: str) -> str:
         """Build the extraction prompt with PDF text"""
-        # Truncate very long text to avoid token limits (keep first 20000 chars for better coverage)
-        max_chars = 20000
-        if len(pdf_text) > max_chars:
-            pdf_text = pdf_text[:max_chars] + "\n\n[Text truncated due to length...]"
+        # Only the document text (and the detection notes derived from it) varies
+        # per call, so it goes last to keep the system prompt a cacheable prefix
+        return f"""Extract all relevant information from the following car insurance policy document text.
+
+Policy Document Text:
+{self._format_document(pdf_text)}"""
+
+    def _build_batch_extraction_prompt(self, pdf_texts: List[str]) -> str:
+        """Build a single extraction prompt covering several PDF texts"""
+        documents = "\n".join(
+            f"Policy Document {i} Text:\n{self._format_document(pdf_text)}"
+            for i, pdf_text in enumerate(pdf_texts, 1)
+        )
+        
+        return f"""Extract all relevant information from each of the following {len(pdf_texts)} car insurance policy documents.
+Treat every document independently. Return a JSON object of the form {{"documents": [{{"document": 1, "data": {{...}}}}, ...]}} with exactly one entry per document, where "document" is the number of the Policy Document the entry belongs to and "data" has the structure described above.
+
+{documents}"""
+
+    def _format_document(self, pdf_text: str) -> str:
+        """Format PDF text, with any detection notes, for inclusion in a prompt"""
+        pdf_text = self._truncate_text(pdf_text)
         
         # Detect if document contains Chinese characters or redaction markers
-        has_chinese = any('\u4e00' <= char <= '\u9fff' for char in pdf_text)
-        has_redaction = any(marker in pdf_text.upper() for marker in ['REDACTED', '***', 'BLACKED', 'MASKED', '████'])
+        has_chinese = bool(_CJK_RE.search(pdf_text))
+        has_redaction = bool(_REDACTION_RE.search(pdf_text))
         
         detection_note = ""
         if has_chinese:
@@ -160,306 +575,109 @@ Important guidelines:
         if has_redaction:
             detection_note += "\nNOTE: This document appears to contain REDACTED information. Use 'REDACTED' as the value for any fields that are blacked out, masked, or show redaction markers.\n"
         
-        return f"""Extract all relevant information from the following car insurance policy document text.
-{detection_note}
-Policy Document Text:
----
+        return f"""---
 {pdf_text}
 ---
+{detection_note}"""
 
-CRITICAL INSTRUCTIONS:
-1. Read through the ENTIRE document text carefully - information may be on any page
-2. Search for ALL required fields listed in the system prompt
-3. For coverage.limitationsOnUse: Check under "POLICY LIABILITY LIMITS ANY ONE EVENT" or "Terms of cover". Extract the content *following* the header.
-4. For coverage.authorizedDrivers: Look for "Authorized Drivers" or "Named driver(s)". Extract the *names* listed, not the header title.
-5. For insurerAndPolicyDetails.insurerName: Search headers, footers, company logos, and all pages. The insurer name is always present somewhere in the document.
-6. For vehicle and policyholder details: Check tables, schedules, and structured sections throughout the document.
-7. For premium information: Look for premium tables, payment summaries, or financial sections.
-8. If you encounter REDACTED, BLACKED OUT, or MASKED fields (showing as ***, [REDACTED], black boxes, etc.), use "REDACTED" as the value - do NOT try to guess or infer the value.
-9. If the document contains Chinese text, extract information from both English and Chinese sections. Look for bilingual labels.
-
-Return all extracted information as KEY-VALUE PAIRS (one per line) as described in the system prompt.
-For required fields that cannot be found, use "UNKNOWN" (not null, not empty) to ensure the data structure is complete.
-For fields that are REDACTED, use "REDACTED" as the value."""
+    def _truncate_text(self, pdf_text: str) -> str:
+        """
+        Truncate very long text to the input token budget.
+        
+        Counting tokens rather than characters bounds the prompt size regardless of
+        language (a Chinese character is roughly one token, English about four
+        characters per token); documents containing Chinese get a larger budget.
+        """
+        encoding = _get_encoding(self.model)
+        if encoding is None:
+            # Tokenizer unavailable: fall back to a character budget
+            if len(pdf_text) > MAX_DOCUMENT_CHARS:
+                pdf_text = pdf_text[:MAX_DOCUMENT_CHARS] + "\n\n[Text truncated due to length...]"
+            return pdf_text
+        
+        max_tokens = MAX_CJK_DOCUMENT_TOKENS if _CJK_RE.search(pdf_text) else MAX_DOCUMENT_TOKENS
+        tokens = encoding.encode(pdf_text, disallowed_special=())
+        if len(tokens) > max_tokens:
+            pdf_text = encoding.decode(tokens[:max_tokens]) + "\n\n[Text truncated due to length...]"
+        return pdf_text
 
-    def _parse_key_value_pairs(self, response_text: str) -> Dict[str, Any]:
+    def _parse_json_response(self, response_text: str) -> Dict[str, Any]:
         """
-        Parse key-value pairs from AI response and construct JSON structure.
+        Parse the JSON object returned by the model into policy data.
         
         Args:
-            response_text: Raw response text with key-value pairs
+            response_text: Raw response text containing a JSON object
             
         Returns:
             Dictionary with structured policy data
         """
-        # Initialize the structure
-        data = {
-            "policyholder": {},
-            "vehicle": {},
-            "coverage": {
-                "liabilityLimits": {},
-                "excess": {}
-            },
-            "premiumAndDiscounts": {
-                "levies": {}
-            },
-            "insurerAndPolicyDetails": {
-                "periodOfInsurance": {}
-            },
-            "additionalEndorsements": {}
-        }
+        data = json.loads(response_text)
+        if not isinstance(data, dict):
+            raise ValueError("OpenAI response is not a JSON object")
         
-        # Parse each line
-        lines = response_text.strip().split('\n')
-        for line in lines:
-            line = line.strip()
-            if not line or ':' not in line:
-                continue
-            
-            # Split key and value
-            parts = line.split(':', 1)
-            if len(parts) != 2:
-                continue
-            
-            key = parts[0].strip()
-            value = parts[1].strip()
-            
-            # Skip empty values (but allow "N/A", "UNKNOWN", and "REDACTED" for required fields)
-            if not value or (value.lower() == 'null' and 'N/A' not in value and 'UNKNOWN' not in value.upper() and 'REDACTED' not in value.upper()):
-                continue
+        return self._normalize_policy_data(data)
+    
+    def _normalize_policy_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Coerce extracted values and fill in missing required fields.
+        
+        Args:
+            data: Policy data object returned by the model
             
-            # Parse nested keys (e.g., "policyholder.name" -> data["policyholder"]["name"])
-            self._set_nested_value(data, key, value)
+        Returns:
+            Dictionary with structured policy data
+        """
+        self._coerce_fields(data)
         
         # Fill in missing required fields with defaults
-        self._fill_missing_required_fields(data)
-        
-        return data
+        return self._fill_missing_required_fields(data)
     
-    def _clean_empty_objects(self, data: Dict[str, Any]):
-        """Remove empty nested objects and arrays"""
-        if isinstance(data, dict):
-            keys_to_remove = []
-            for key, value in data.items():
-                if isinstance(value, dict):
-                    self._clean_empty_objects(value)
-                    if not value:
-                        keys_to_remove.append(key)
-                elif isinstance(value, list):
-                    if not value:
-                        keys_to_remove.append(key)
-            
-            for key in keys_to_remove:
-                del data[key]
-    
-    def _set_nested_value(self, data: Dict[str, Any], key_path: str, value: Any):
+    def _coerce_fields(self, data: Dict[str, Any]):
         """
-        Set a nested value in the data structure using dot notation.
+        Normalize extracted values in place to the types expected by the schema.
+        
+        Null or uninterpretable values are dropped so that optional fields are
+        omitted and required fields are filled with defaults.
         
         Args:
-            data: The data dictionary to modify
-            key_path: Dot-separated key path (e.g., "policyholder.name")
-            value: Value to set
+            data: The (nested) data dictionary to normalize
         """
-        keys = key_path.split('.')
-        current = data
-        
-        # Navigate to the parent of the target key
-        for key in keys[:-1]:
-            if key not in current:
-                current[key] = {}
-            current = current[key]
-        
-        # Set the final value
-        final_key = keys[-1]
-        
-        # Handle special cases
-        if final_key == "namedDrivers" or final_key == "endorsements" or final_key == "details":
-            # Parse comma-separated array values
-            if value and value != "N/A" and "UNKNOWN - standard" not in value:
-                current[final_key] = [v.strip() for v in value.split(',') if v.strip()]
+        for key in list(data):
+            value = data[key]
+            if value is None:
+                del data[key]
+            elif key == "limitationsOnUse" and not isinstance(value, dict):
+                # Accept a bare list/string of restrictions in place of the object
+                data[key] = {"details": _coerce_array(value)}
+            elif key in _OBJECT_FIELDS and not isinstance(value, dict):
+                del data[key]
+            elif isinstance(value, dict):
+                self._coerce_fields(value)
             else:
-                if value and "UNKNOWN - standard" in value:
-                    current[final_key] = [value] # Keep the unknown message as a single item
-                else:
-                    current[final_key] = []
-        elif final_key in ["yearOfManufacture", "seatingCapacity"]:
-            # Parse integers
-            try:
-                current[final_key] = int(value) if value != "N/A" else None
-            except (ValueError, TypeError):
-                current[final_key] = None
-        elif final_key in ["premiumAmount", "totalPayable", "noClaimDiscount", "bodilyInjury", 
-                          "propertyDamage", "cubicCapacity", "estimatedValue", "mib",
-                          "thirdPartyProperty", "youngDriver", "inexperiencedDriver", "unnamedDriver"]:
-            # Parse numbers
-            try:
-                # Remove currency symbols and commas
-                cleaned = value.replace('$', '').replace(',', '').replace('HKD', '').strip()
-                if cleaned and cleaned != "N/A":
-                    current[final_key] = float(cleaned) if '.' in cleaned else int(cleaned)
-                else:
-                    current[final_key] = None
-            except (ValueError, TypeError):
-                current[final_key] = None
-        elif final_key == "ia":
-            # Can be number or string
-            try:
-                cleaned = value.replace('$', '').replace(',', '').replace('HKD', '').strip()
-                if cleaned and cleaned.upper() != "INCLUDED" and cleaned != "N/A":
-                    current[final_key] = float(cleaned) if '.' in cleaned else int(cleaned)
+                # Unlisted fields are optional strings
+                value = _FIELD_COERCERS.get(key, _coerce_optional_string)(value)
+                if value is None:
+                    del data[key]
                 else:
-                    current[final_key] = value if value.upper() == "INCLUDED" else None
-            except (ValueError, TypeError):
-                current[final_key] = value if value.upper() == "INCLUDED" else None
-        else:
-            # String values - for required fields, keep "N/A" or "UNKNOWN" as strings
-            # Required string fields that should never be None:
-            required_string_fields = [
-                "name", "address", "occupation", "registrationMark", "makeAndModel",
-                "chassisNumber", "bodyType", "typeOfCover", "limitationsOnUse",
-                "authorizedDrivers", "insurerName", "policyNumber"
-            ]
-            
-            if final_key in required_string_fields:
-                # Keep "N/A", "UNKNOWN", or "REDACTED" as strings for required fields
-                if value.upper() in ["N/A", "UNKNOWN", "REDACTED"]:
-                    current[final_key] = value.upper()
-                elif value.upper().startswith("UNKNOWN") or value.upper().startswith("REDACTED"):
-                    current[final_key] = value  # Keep full "UNKNOWN - ..." or "REDACTED" message
-                else:
-                    current[final_key] = value
-            else:
-                # Optional string fields can be None
-                current[final_key] = value if value != "N/A" else None
+                    data[key] = value
     
-    def _fill_missing_required_fields(self, data: Dict[str, Any]):
+    def _fill_missing_required_fields(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Fill in missing required fields with default values to ensure schema validation passes.
         
         Args:
-            data: The data dictionary to fill
+            data: The extracted data dictionary
+            
+        Returns:
+            A copy of the default policy data with the extracted values overlaid
         """
-        # Required string fields with defaults
-        defaults = {
-            "policyholder": {
-                "name": "UNKNOWN",
-                "address": "UNKNOWN",
-                "occupation": "UNKNOWN"
-            },
-            "vehicle": {
-                "registrationMark": "UNKNOWN",
-                "makeAndModel": "UNKNOWN",
-                "yearOfManufacture": 0,  # Default integer for required field
-                "chassisNumber": "UNKNOWN",
-                "seatingCapacity": 0,  # Default integer for required field
-                "bodyType": "UNKNOWN"
-            },
-            "coverage": {
-                "typeOfCover": "UNKNOWN",
-                "limitationsOnUse": {
-                    "details": ["UNKNOWN - standard usage restrictions apply"]
-                },
-                "authorizedDrivers": "UNKNOWN - standard driver authorization applies",
-                "liabilityLimits": {
-                    "bodilyInjury": 0,
-                    "propertyDamage": 0
-                },
-                "excess": {}
-            },
-            "premiumAndDiscounts": {
-                "premiumAmount": 0.0,
-                "totalPayable": 0.0,
-                "noClaimDiscount": 0.0
-            },
-            "insurerAndPolicyDetails": {
-                "insurerName": "UNKNOWN",
-                "policyNumber": "UNKNOWN",
-                "periodOfInsurance": {
-                    "start": "UNKNOWN",
-                    "end": "UNKNOWN"
-                }
-            }
-        }
+        filled = _overlay(json.loads(_DEFAULT_POLICY_DATA_JSON), data)
         
-        # Fill policyholder
-        for key, default in defaults["policyholder"].items():
-            if key not in data.get("policyholder", {}) or data["policyholder"].get(key) is None:
-                if "policyholder" not in data:
-                    data["policyholder"] = {}
-                data["policyholder"][key] = default
-        
-        # Fill vehicle
-        if "vehicle" not in data:
-            data["vehicle"] = {}
-        for key, default in defaults["vehicle"].items():
-            # For integer fields, check if None or missing
-            if key in ["yearOfManufacture", "seatingCapacity"]:
-                if key not in data["vehicle"] or data["vehicle"].get(key) is None:
-                    data["vehicle"][key] = default
-            else:
-                # For string fields, check if None or missing
-                if key not in data["vehicle"] or data["vehicle"].get(key) is None:
-                    data["vehicle"][key] = default
-        
-        # Fill coverage
-        if "coverage" not in data:
-            data["coverage"] = {}
-        
-        for key, default in defaults["coverage"].items():
-            if key == "liabilityLimits":
-                if "liabilityLimits" not in data["coverage"]:
-                    data["coverage"]["liabilityLimits"] = {}
-                for sub_key, sub_default in default.items():
-                    if sub_key not in data["coverage"]["liabilityLimits"] or data["coverage"]["liabilityLimits"].get(sub_key) is None:
-                        data["coverage"]["liabilityLimits"][sub_key] = sub_default
-            elif key == "excess":
-                if "excess" not in data["coverage"]:
-                    data["coverage"]["excess"] = {}
-            elif key == "limitationsOnUse":
-                if "limitationsOnUse" not in data["coverage"]:
-                    data["coverage"]["limitationsOnUse"] = default
-                # Ensure details exists if object exists
-                elif "details" not in data["coverage"]["limitationsOnUse"]:
-                    data["coverage"]["limitationsOnUse"]["details"] = default["details"]
-            else:
-                if key not in data["coverage"] or data["coverage"].get(key) is None:
-                    data["coverage"][key] = default
-        
-        # Fill premiumAndDiscounts
-        if "premiumAndDiscounts" not in data:
-            data["premiumAndDiscounts"] = {}
-        for key, default in defaults["premiumAndDiscounts"].items():
-            if key not in data["premiumAndDiscounts"] or data["premiumAndDiscounts"].get(key) is None:
-                data["premiumAndDiscounts"][key] = default
-        
-        # Handle levies - remove null values or set defaults
-        if "levies" in data["premiumAndDiscounts"]:
-            levies = data["premiumAndDiscounts"]["levies"]
-            # Set default 0 for mib if null
-            if "mib" in levies and levies["mib"] is None:
-                levies["mib"] = 0.0
-            # Set default 0 for ia if null
-            if "ia" in levies and levies["ia"] is None:
-                levies["ia"] = 0.0
-            # Remove levies object if both are missing/null (shouldn't happen after above, but just in case)
-            if not levies or (levies.get("mib") is None and levies.get("ia") is None):
-                data["premiumAndDiscounts"].pop("levies", None)
-        
-        # Fill insurerAndPolicyDetails
-        if "insurerAndPolicyDetails" not in data:
-            data["insurerAndPolicyDetails"] = {}
-        if "periodOfInsurance" not in data["insurerAndPolicyDetails"]:
-            data["insurerAndPolicyDetails"]["periodOfInsurance"] = {}
-        
-        for key, default in defaults["insurerAndPolicyDetails"].items():
-            if key == "periodOfInsurance":
-                for sub_key, sub_default in default.items():
-                    if sub_key not in data["insurerAndPolicyDetails"]["periodOfInsurance"] or data["insurerAndPolicyDetails"]["periodOfInsurance"].get(sub_key) is None:
-                        data["insurerAndPolicyDetails"]["periodOfInsurance"][sub_key] = sub_default
-            else:
-                if key not in data["insurerAndPolicyDetails"] or data["insurerAndPolicyDetails"].get(key) is None:
-                    data["insurerAndPolicyDetails"][key] = default
+        # Drop the levies object if no levy was extracted
+        if not filled["premiumAndDiscounts"].get("levies"):
+            filled["premiumAndDiscounts"].pop("levies", None)
+        
+        return filled
 
 
 def extract_policy_data(pdf_text: str, api_key: Optional[str] = None, model: str = "gpt-4o") -> Dict[str, Any]:
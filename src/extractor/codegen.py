@@ -0,0 +1,181 @@
+"""Generate a validator specialized to validator.json
+
+The schema is fixed when the package is built, so instead of interpreting it for
+every document it is compiled ahead of time into straight-line type checks in
+_generated_validator.py. Regenerate that module after changing validator.json:
+
+    python -m src.extractor.codegen
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+SCHEMA_PATH = Path(__file__).parent.parent.parent / "validator.json"
+OUTPUT_PATH = Path(__file__).parent / "_generated_validator.py"
+
+# Keywords that only annotate the schema. Formats are not enforced: dates are
+# extracted as DD/MM/YYYY or "UNKNOWN"
+_ANNOTATION_KEYWORDS = frozenset({"$schema", "title", "description", "format"})
+_SUPPORTED_KEYWORDS = frozenset({"type", "properties", "required", "items"}) | _ANNOTATION_KEYWORDS
+
+# JSON Schema (draft-07) type checks; booleans are not numbers, and integral
+# floats such as 2020.0 are integers
+_TYPE_CHECKS = {
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, list)",
+    "string": "isinstance({v}, str)",
+    "number": "isinstance({v}, (int, float)) and not isinstance({v}, bool)",
+    "integer": "isinstance({v}, int) and not isinstance({v}, bool) or isinstance({v}, float) and {v}.is_integer()",
+    "boolean": "isinstance({v}, bool)",
+    "null": "{v} is None",
+}
+
+_HEADER = '''"""Validator generated from validator.json by codegen.py; do not edit by hand.
+
+Regenerate with: python -m src.extractor.codegen
+"""
+
+from typing import Any, List
+
+
+def validate(data: Any) -> List[str]:
+    """Return the schema violations in data as "path: message" strings"""
+    errors = []
+'''
+
+
+class _Generator:
+    """Emits one function per object schema, each checking its properties inline"""
+
+    def __init__(self):
+        self.functions: List[List[str]] = []
+        self.names = set()
+
+    def object_function(self, schema: Dict[str, Any], path: Tuple[str, ...]) -> str:
+        """Emit the function validating an object schema and return its name"""
+        name = "_validate_" + ("_".join(re.sub(r"\W", "_", part) for part in path) or "root")
+        if name in self.names:
+            raise ValueError(f"Duplicate validator name {name} at {_label(path)}")
+        self.names.add(name)
+
+        lines = ["", "", f"def {name}(value, errors):"]
+        self.functions.append(lines)
+
+        required = schema.get("required", [])
+        properties = schema.get("properties", {})
+
+        for prop_name in required:
+            if prop_name not in properties:
+                lines.append(f"    if {prop_name!r} not in value:")
+                lines.append(f"        errors.append({_label(path + (prop_name,)) + ': is required'!r})")
+
+        for prop_name, prop_schema in properties.items():
+            prop_path = path + (prop_name,)
+            checks = self.checks(prop_schema, "field", prop_path, 2)
+
+            if prop_name in required:
+                lines.append(f"    if {prop_name!r} not in value:")
+                lines.append(f"        errors.append({_label(prop_path) + ': is required'!r})")
+                if checks:
+                    lines.append("    else:")
+            elif checks:
+                lines.append(f"    if {prop_name!r} in value:")
+
+            if checks:
+                lines.append(f"        field = value[{prop_name!r}]")
+                lines.extend(checks)
+
+        if len(lines) == 3:
+            lines.append("    pass")
+        return name
+
+    def checks(self, schema: Dict[str, Any], var: str, path: Tuple[str, ...], depth: int,
+               item_index: str = "") -> List[str]:
+        """Return the lines validating the value in var against schema"""
+        unsupported = set(schema) - _SUPPORTED_KEYWORDS
+        if unsupported:
+            raise ValueError(f"Unsupported keyword(s) {sorted(unsupported)} at {_label(path)}")
+
+        types = schema.get("type", [])
+        if isinstance(types, str):
+            types = [types]
+        unknown_types = set(types) - set(_TYPE_CHECKS)
+        if unknown_types:
+            raise ValueError(f"Unsupported type(s) {sorted(unknown_types)} at {_label(path)}")
+
+        nested = [keyword for keyword in ("properties", "required", "items") if keyword in schema]
+        if nested and types not in (["object"], ["array"]):
+            raise ValueError(f"{nested} at {_label(path)} requires a single object or array type")
+        if item_index and nested:
+            raise ValueError(f"Nested objects and arrays in array items are not supported at {_label(path)}")
+
+        if not types:
+            return []
+
+        indent = "    " * depth
+        type_checks = [_TYPE_CHECKS[t].format(v=var) for t in types]
+        condition = " or ".join(f"({check})" for check in type_checks) if len(types) > 1 else type_checks[0]
+        message = ": must be " + " or ".join(types)
+        if item_index:
+            # Array item paths include the index, known only at runtime
+            label = _label(path).replace("{", "{{").replace("}", "}}")
+            message_expr = f'f"{label} -> {{{item_index}}}{message}"'
+        else:
+            message_expr = repr(_label(path) + message)
+
+        lines = [f"{indent}if not ({condition}):", f"{indent}    errors.append({message_expr})"]
+
+        body = []
+        if types == ["object"] and nested:
+            body.append(f"{indent}    {self.object_function(schema, path)}({var}, errors)")
+        elif types == ["array"] and "items" in schema:
+            item_checks = self.checks(schema["items"], "item", path, depth + 2, item_index="index")
+            if item_checks:
+                body.append(f"{indent}    for index, item in enumerate({var}):")
+                body.extend(item_checks)
+
+        if body:
+            lines.append(f"{indent}else:")
+            lines.extend(body)
+        return lines
+
+
+def _label(path: Tuple[str, ...]) -> str:
+    """Format a field path the way validation errors report it"""
+    return " -> ".join(path) or "root"
+
+
+def generate(schema: Dict[str, Any]) -> str:
+    """
+    Generate the source of a validator module for a JSON schema.
+
+    Supports the subset of JSON Schema that validator.json uses (type, properties,
+    required and items) and raises ValueError for anything else, so the generated
+    checks can't silently diverge from the schema.
+
+    Args:
+        schema: Parsed JSON schema
+
+    Returns:
+        Python source code defining validate(data) -> List[str]
+    """
+    generator = _Generator()
+    validate_body = generator.checks(schema, "data", (), 1) + ["    return errors"]
+
+    functions = [validate_body] + generator.functions
+    return _HEADER + "\n".join("\n".join(lines) for lines in functions) + "\n"
+
+
+def main():
+    """Regenerate _generated_validator.py from validator.json"""
+    with open(SCHEMA_PATH, 'r') as f:
+        schema = json.load(f)
+
+    OUTPUT_PATH.write_text(generate(schema), encoding="utf-8")
+    print(f"Wrote {OUTPUT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,64 @@
 """PDF text extraction with OCR fallback support"""
 
+import hashlib
+import io
 import logging
+import multiprocessing
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Union
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
 import pdfplumber
-from pdf2image import convert_from_path
-import pytesseract
-from PIL import Image
+
+# The OCR libraries (pdf2image, pytesseract, tesserocr) are imported inside the
+# functions that use them, so callers that only need direct text extraction
+# don't pay their import cost
+if TYPE_CHECKING:
+    from PIL import Image
 
 logger = logging.getLogger(__name__)
 
+# Pages are OCR'd in parallel, so keep each tesseract process single-threaded
+# to avoid oversubscribing the CPU
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+# Rendering resolution for OCR; Tesseract time scales with pixel count and
+# ~200 DPI recognizes as well as 300 DPI on typical policy documents
+OCR_DPI = 200
+# Use the LSTM engine only
+OCR_CONFIG = "--oem 1"
+
+# Pages with less directly extracted text than this are treated as scanned
+MIN_PAGE_TEXT_CHARS = 20
+
+# Minimum pages per worker process before direct extraction is split across processes
+DIRECT_PAGES_PER_WORKER = 4
+
+# When set, extracted text is cached in this directory by PDF content hash, so
+# re-processing the same document skips parsing and OCR. Opt-in: meant for
+# development and test loops, and the directory is not size-bounded
+TEXT_CACHE_DIR = Path(os.environ["PDF_TEXT_CACHE_DIR"]) if os.getenv("PDF_TEXT_CACHE_DIR") else None
+
+# Part of the text cache key; bump when a code change alters the extracted text
+TEXT_EXTRACTION_VERSION = 1
+
+# In-process memo of complete extractions by (path, mtime, size, use_ocr), used
+# when callers opt in with memoize=True
+TEXT_MEMO_SIZE = 32
+_text_memo: "OrderedDict[Tuple[Path, int, int, bool], str]" = OrderedDict()
+_text_memo_lock = threading.Lock()
 
-def extract_text_from_pdf(pdf_path: Union[str, Path], use_ocr: bool = True) -> str:
+# Per-thread tesserocr API handles, keyed by language, so each worker loads the
+# Tesseract models once and reuses them for all of its pages
+_tess_local = threading.local()
+
+
+def extract_text_from_pdf(pdf_path: Union[str, Path], use_ocr: bool = True, memoize: bool = False) -> str:
     """
     Extract text from a PDF file.
     
@@ -21,6 +68,8 @@ def extract_text_from_pdf(pdf_path: Union[str, Path], use_ocr: bool = True) -> s
     Args:
         pdf_path: Path to the PDF file
         use_ocr: Whether to use OCR as fallback (default: True)
+        memoize: Keep the result in memory for repeat calls on the same file
+                 (default: False; not useful for one-off files such as uploads)
         
     Returns:
         Extracted text content as a string
@@ -30,89 +79,342 @@ def extract_text_from_pdf(pdf_path: Union[str, Path], use_ocr: bool = True) -> s
     if not pdf_path.exists():
         raise FileNotFoundError(f"PDF file not found: {pdf_path}")
     
+    if not memoize:
+        return _extract_text_cached(pdf_path, use_ocr)[0]
+    
+    # mtime and size are part of the key so an edited file is re-extracted
+    stat = pdf_path.stat()
+    memo_key = (pdf_path.resolve(), stat.st_mtime_ns, stat.st_size, use_ocr)
+    
+    with _text_memo_lock:
+        if memo_key in _text_memo:
+            _text_memo.move_to_end(memo_key)
+            return _text_memo[memo_key]
+    
+    text_content, complete = _extract_text_cached(pdf_path, use_ocr)
+    
+    # Results with failed pages are not cached, so a transient failure is retried
+    if complete:
+        with _text_memo_lock:
+            _text_memo[memo_key] = text_content
+            if len(_text_memo) > TEXT_MEMO_SIZE:
+                _text_memo.popitem(last=False)
+    
+    return text_content
+
+
+def _extract_text_cached(pdf_path: Path, use_ocr: bool) -> Tuple[str, bool]:
+    """Extract text via the on-disk cache when enabled; returns (text, complete)"""
+    if TEXT_CACHE_DIR is None:
+        return _extract_text(pdf_path, use_ocr)
+    
+    cache_path = TEXT_CACHE_DIR / f"{_text_cache_key(pdf_path, use_ocr)}.txt"
+    
+    try:
+        return cache_path.read_text(encoding="utf-8"), True
+    except OSError:
+        pass
+    
+    text_content, complete = _extract_text(pdf_path, use_ocr)
+    if complete:
+        _write_text_cache(cache_path, text_content)
+    
+    return text_content, complete
+
+
+def _text_cache_key(pdf_path: Path, use_ocr: bool) -> str:
+    """Hash the PDF content together with the settings that affect its extracted text"""
+    settings = [TEXT_EXTRACTION_VERSION, pdfplumber.__version__, MIN_PAGE_TEXT_CHARS, use_ocr]
+    if use_ocr:
+        settings += [OCR_DPI, OCR_CONFIG, _get_ocr_lang(), "tesserocr" if _get_tesserocr() else "tesseract"]
+    
+    digest = hashlib.blake2b(pdf_path.read_bytes(), digest_size=16)
+    digest.update(repr(settings).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _write_text_cache(cache_path: Path, text_content: str):
+    """Atomically write extracted text to the cache; failures are only logged"""
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_text(text_content, encoding="utf-8")
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Failed to write text cache {cache_path}: {e}")
+
+
+def _extract_text(pdf_path: Path, use_ocr: bool) -> Tuple[str, bool]:
+    """
+    Run direct extraction, falling back to OCR when it yields little text.
+    
+    Returns:
+        Tuple of (extracted text, whether every page was extracted without errors)
+    """
     # Try direct text extraction first
-    text_content = _extract_text_direct(pdf_path)
+    page_texts = _extract_text_direct(pdf_path)
+    complete = page_texts is not None and None not in page_texts.values()
+    page_texts = page_texts or {}
+    text_content = _join_pages(page_texts)
     
     # Check if we got meaningful text (more than just whitespace/formatting)
     text_length = len(text_content.strip())
     
     # If text extraction yielded very little content, try OCR
     if use_ocr and text_length < 100:
-        logger.info(f"Direct extraction yielded only {text_length} characters, trying OCR...")
-        ocr_text = _extract_text_ocr(pdf_path)
+        # Only OCR the pages that yielded (almost) no text directly; all pages if
+        # direct extraction failed altogether
+        pages = [page_num for page_num, page_text in page_texts.items()
+                 if len((page_text or "").strip()) < MIN_PAGE_TEXT_CHARS] if page_texts else None
         
-        # Use OCR result if it's significantly longer
-        if len(ocr_text.strip()) > text_length * 1.5:
-            logger.info(f"OCR extraction yielded {len(ocr_text.strip())} characters, using OCR result")
-            return ocr_text
+        if pages != []:
+            logger.info(f"Direct extraction yielded only {text_length} characters, trying OCR...")
+            ocr_texts = _extract_text_ocr(pdf_path, pages)
+            complete = complete and ocr_texts is not None and None not in ocr_texts.values()
+            ocr_text = _join_pages({**page_texts, **(ocr_texts or {})})
+            
+            # Use OCR result if it's significantly longer
+            if len(ocr_text.strip()) > text_length * 1.5:
+                logger.info(f"OCR extraction yielded {len(ocr_text.strip())} characters, using OCR result")
+                return ocr_text, complete
     
-    return text_content
+    return text_content, complete
+
 
+def _join_pages(page_texts: Dict[int, Optional[str]]) -> str:
+    """Join per-page texts in page order, with a header before each non-empty page"""
+    return "\n".join(
+        f"--- Page {page_num} ---\n{page_text}\n"
+        for page_num, page_text in sorted(page_texts.items())
+        if page_text
+    )
 
-def _extract_text_direct(pdf_path: Path) -> str:
-    """Extract text directly from PDF using pdfplumber"""
-    text_parts = []
+
+def _extract_text_direct(pdf_path: Path) -> Optional[Dict[int, Optional[str]]]:
+    """
+    Extract text directly from PDF using pdfplumber, keyed by page number.
     
+    Pages that failed to extract map to None; returns None if the PDF could not be read.
+    """
     try:
         with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages, 1):
-                try:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text_parts.append(f"--- Page {page_num} ---\n{page_text}\n")
-                except Exception as e:
-                    logger.warning(f"Error extracting text from page {page_num}: {e}")
-                    continue
+            page_count = len(pdf.pages)
         
-        return "\n".join(text_parts)
+        workers = min(os.cpu_count() or 1, page_count // DIRECT_PAGES_PER_WORKER)
+        if workers < 2:
+            return _extract_pages_direct(pdf_path)
+        
+        # pdfminer's layout analysis is pure Python and holds the GIL, so long
+        # documents are split into contiguous page ranges across processes
+        page_numbers = list(range(1, page_count + 1))
+        chunk_size = -(-page_count // workers)
+        chunks = [page_numbers[i:i + chunk_size] for i in range(0, page_count, chunk_size)]
+        
+        pool = _get_process_pool()
+        try:
+            page_texts = {}
+            for chunk_texts in pool.map(_extract_pages_direct, [pdf_path] * len(chunks), chunks):
+                page_texts.update(chunk_texts)
+            return page_texts
+        except BrokenProcessPool as e:
+            # A worker died (e.g. killed for memory); replace the pool for later
+            # calls and extract this document in-process
+            logger.warning(f"Direct extraction worker pool broke ({e}), extracting in-process")
+            _get_process_pool.cache_clear()
+            pool.shutdown(wait=False)
+            return _extract_pages_direct(pdf_path)
     
     except Exception as e:
         logger.error(f"Error in direct text extraction: {e}")
-        return ""
+        return None
+
+
+def _extract_pages_direct(pdf_path: Path, pages: Optional[List[int]] = None) -> Dict[int, Optional[str]]:
+    """Extract text from the given pages (default: all) using pdfplumber; None for failed pages"""
+    page_texts = {}
+    
+    with pdfplumber.open(pdf_path, pages=pages) as pdf:
+        for page in pdf.pages:
+            page_num = page.page_number
+            try:
+                page_texts[page_num] = page.extract_text() or ""
+            except Exception as e:
+                logger.warning(f"Error extracting text from page {page_num}: {e}")
+                page_texts[page_num] = None
+            finally:
+                # Drop the page's cached chars/lines/rects so memory stays
+                # bounded by one page rather than the whole document
+                page.flush_cache()
+    
+    return page_texts
+
+
+@lru_cache(maxsize=1)
+def _get_process_pool() -> ProcessPoolExecutor:
+    """
+    Get the process pool used for direct extraction of long documents.
+    
+    Created once and kept alive so worker start-up (and importing pdfplumber) is
+    paid only once. Workers are spawned rather than forked, since the API calls
+    this from worker threads.
+    """
+    return ProcessPoolExecutor(
+        max_workers=os.cpu_count() or 1,
+        mp_context=multiprocessing.get_context("spawn")
+    )
 
 
-def _extract_text_ocr(pdf_path: Path) -> str:
-    """Extract text using OCR (Tesseract) with support for Chinese and English"""
-    text_parts = []
+def _extract_text_ocr(pdf_path: Path, pages: Optional[List[int]] = None) -> Optional[Dict[int, Optional[str]]]:
+    """
+    Extract text using OCR (Tesseract) with support for Chinese and English.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        pages: 1-based page numbers to OCR (default: all pages)
+        
+    Returns:
+        OCR'd text keyed by page number (pages without text are omitted, pages
+        that failed map to None), or None if OCR failed altogether
+    """
+    page_texts = {}
     
     try:
-        # Convert PDF pages to images
-        images = convert_from_path(pdf_path, dpi=300)
+        from pdf2image import pdfinfo_from_path
         
-        # Try to detect if Chinese language support is available
-        # Use 'chi_sim+eng' for Simplified Chinese + English, fallback to 'eng' only
-        try:
-            # Check if Chinese language data is available
-            pytesseract.get_languages()
-            lang = 'chi_sim+eng'  # Simplified Chinese + English
-        except:
-            lang = 'eng'  # Fallback to English only
+        lang = _get_ocr_lang()
         
-        for page_num, image in enumerate(images, 1):
-            try:
-                # Perform OCR on the image with language support
-                page_text = pytesseract.image_to_string(image, lang=lang)
-                if page_text.strip():
-                    text_parts.append(f"--- Page {page_num} ---\n{page_text}\n")
-            except Exception as e:
-                # If Chinese+English fails, try English only
-                if lang != 'eng':
-                    try:
-                        page_text = pytesseract.image_to_string(image, lang='eng')
-                        if page_text.strip():
-                            text_parts.append(f"--- Page {page_num} ---\n{page_text}\n")
-                    except:
-                        logger.warning(f"Error performing OCR on page {page_num}: {e}")
-                else:
-                    logger.warning(f"Error performing OCR on page {page_num}: {e}")
-                continue
+        if pages is None:
+            pages = list(range(1, pdfinfo_from_path(pdf_path)["Pages"] + 1))
+        if not pages:
+            return {}
+        
+        # Pages are rendered and recognized in parallel: the workers spend their time in
+        # poppler/tesseract rather than holding the GIL, and rendering overlaps with OCR.
+        # Only one image per worker is held in memory at a time. map() keeps page order.
+        ocr_texts = _get_ocr_pool().map(_ocr_page, [pdf_path] * len(pages), [lang] * len(pages), pages)
         
-        return "\n".join(text_parts)
+        for page_num, page_text in zip(pages, ocr_texts):
+            if page_text is None or page_text.strip():
+                page_texts[page_num] = page_text
+        
+        return page_texts
     
     except Exception as e:
         logger.error(f"Error in OCR extraction: {e}")
-        # If OCR fails, return empty string (will fall back to direct extraction result)
-        return ""
+        # If OCR fails, return no text (will fall back to direct extraction result)
+        return None
+
+
+@lru_cache(maxsize=1)
+def _get_ocr_pool() -> ThreadPoolExecutor:
+    """
+    Get the thread pool that OCRs pages, shared by all documents.
+    
+    Kept alive so each worker's tesserocr handles (see _tess_local) are reused
+    across documents, and so concurrent requests together never run more OCR
+    workers than there are CPUs.
+    """
+    return ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="ocr")
+
+
+@lru_cache(maxsize=1)
+def _get_ocr_lang() -> str:
+    """
+    Get the Tesseract language setting, detected once per process.
+    
+    Uses 'chi_sim+eng' (Simplified Chinese + English) if Chinese language data is
+    installed, otherwise 'eng' only.
+    """
+    try:
+        tesserocr = _get_tesserocr()
+        if tesserocr is not None:
+            _, languages = tesserocr.get_languages()
+        else:
+            import pytesseract
+            languages = pytesseract.get_languages(config='')
+        if 'chi_sim' in languages:
+            return 'chi_sim+eng'
+    except Exception as e:
+        logger.warning(f"Could not list Tesseract languages: {e}")
+    return 'eng'
+
+
+def _ocr_page(pdf_path: Path, lang: str, page_num: int) -> Optional[str]:
+    """Render a single PDF page and perform OCR on it, returning None if it fails"""
+    from pdf2image import convert_from_path
+    
+    try:
+        # Convert the PDF page to an image, rendered directly in grayscale so
+        # Tesseract gets a single channel to binarize instead of RGB
+        image = convert_from_path(
+            pdf_path, dpi=OCR_DPI, first_page=page_num, last_page=page_num, grayscale=True
+        )[0]
+    except Exception as e:
+        logger.warning(f"Error converting page {page_num} to an image: {e}")
+        return None
+    
+    try:
+        # Perform OCR on the image with language support
+        return _recognize(image, lang)
+    except Exception as e:
+        # If Chinese+English fails, try English only
+        if lang != 'eng':
+            try:
+                return _recognize(image, 'eng')
+            except:
+                pass
+        logger.warning(f"Error performing OCR on page {page_num}: {e}")
+        return None
+
+
+@lru_cache(maxsize=1)
+def _get_tesserocr():
+    """Import tesserocr, the in-process Tesseract API, or return None if it is not installed"""
+    try:
+        # Optional since it must be built against libtesseract
+        import tesserocr
+    except ImportError:
+        return None
+    return tesserocr
+
+
+def _recognize(image: "Image.Image", lang: str) -> str:
+    """Run Tesseract on an image, in-process via tesserocr when it is installed"""
+    tesserocr = _get_tesserocr()
+    if tesserocr is None:
+        return _recognize_subprocess(image, lang)
+    
+    apis = _tess_local.__dict__.setdefault("apis", {})
+    if lang not in apis:
+        apis[lang] = tesserocr.PyTessBaseAPI(lang=lang, oem=tesserocr.OEM.LSTM_ONLY)
+    
+    api = apis[lang]
+    api.SetImage(image)
+    return api.GetUTF8Text()
+
+
+def _recognize_subprocess(image: "Image.Image", lang: str) -> str:
+    """
+    Run the tesseract CLI on an image piped through stdin.
+    
+    pytesseract.image_to_string would write the image to a temporary PNG and read
+    the result back from a file; an uncompressed TIFF is much cheaper to encode
+    and the pipes avoid touching disk. Starts a tesseract process (and loads the
+    models) per call.
+    """
+    import pytesseract
+    
+    buffer = io.BytesIO()
+    image.save(buffer, format="TIFF")
+    
+    # Honours a tesseract_cmd configured for pytesseract
+    result = subprocess.run(
+        [pytesseract.pytesseract.tesseract_cmd, "stdin", "stdout", "-l", lang, *OCR_CONFIG.split()],
+        input=buffer.getvalue(),
+        capture_output=True,
+        check=True
+    )
+    return result.stdout.decode("utf-8")
 
 
 def clean_text(text: str) -> str:
@@ -125,13 +427,8 @@ def clean_text(text: str) -> str:
     Returns:
         Cleaned text
     """
-    # Remove excessive whitespace
-    lines = text.split('\n')
-    cleaned_lines = []
-    
-    for line in lines:
-        cleaned_line = ' '.join(line.split())
-        if cleaned_line:  # Skip empty lines
-            cleaned_lines.append(cleaned_line)
-    
-    return '\n'.join(cleaned_lines)
+    # Remove excessive whitespace within each line and skip empty lines; map/filter
+    # keep the per-line loop inside C string methods. str.split() also collapses
+    # Unicode whitespace such as the ideographic space in Chinese OCR output,
+    # which a byte-level (e.g. JIT-compiled) loop would miss
+    return '\n'.join(filter(None, map(' '.join, map(str.split, text.split('\n')))))
@@ -0,0 +1,91 @@
+"""Persistent cache of AI extraction results keyed by PDF text hash"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Iterator, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "ocr-extractor" / "responses.sqlite3"
+
+
+class ResponseCache:
+    """Exact-match cache of extraction results stored in a local SQLite database"""
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        """
+        Initialize the response cache.
+
+        Args:
+            path: SQLite database file (defaults to EXTRACTION_CACHE_PATH env var,
+                  then ~/.cache/ocr-extractor/responses.sqlite3)
+        """
+        self.path = Path(path or os.getenv("EXTRACTION_CACHE_PATH") or DEFAULT_CACHE_PATH)
+        self.enabled = True
+
+        # The cache is optional: if it can't be created, run without it
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, data TEXT NOT NULL)"
+                )
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Response cache disabled, could not open {self.path}: {e}")
+            self.enabled = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A fresh connection per operation keeps the cache safe to share across threads
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(pdf_text: str, model: str, system_prompt: str, version: str) -> str:
+        """
+        Build the cache key for a document.
+
+        The model, system prompt and version (of the code that prepares the prompt
+        and normalizes the response) are part of the key so that changing any of
+        them invalidates previously cached results.
+        """
+        digest = hashlib.sha256()
+        for part in (version, model, system_prompt, pdf_text):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached extraction result for key, or None on a miss"""
+        if not self.enabled:
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT data FROM responses WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, data: Dict[str, Any]):
+        """Store an extraction result under key"""
+        if not self.enabled:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, data) VALUES (?, ?)",
+                    (key, json.dumps(data))
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache write failed: {e}")
@@ -2,10 +2,11 @@
 
 import json
 import logging
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any, List, Tuple
-import jsonschema
-from jsonschema import validate, ValidationError
+
+from src.extractor import _generated_validator
 
 logger = logging.getLogger(__name__)
 
@@ -22,8 +23,9 @@ class ValidationResult:
         return self.is_valid
 
 
+@lru_cache(maxsize=1)
 def _load_schema() -> Dict[str, Any]:
-    """Load JSON schema from validator.json file"""
+    """Load JSON schema from validator.json file (read once and cached)"""
     schema_path = Path(__file__).parent.parent.parent / "validator.json"
     
     if not schema_path.exists():
@@ -47,31 +49,16 @@ def validate_extracted_data(data: Dict[str, Any]) -> Tuple[Dict[str, Any], Valid
     missing_fields = []
     
     try:
-        schema = _load_schema()
-        
-        # Validate against JSON schema
-        validate(instance=data, schema=schema)
+        # Validate against validator.json, compiled ahead of time into straight-line
+        # type checks (see codegen.py)
+        for error_msg in _generated_validator.validate(data):
+            errors.append(error_msg)
+            logger.warning(f"Validation error: {error_msg}")
         
         # Check for missing required fields
-        _check_missing_fields(data, schema, missing_fields)
-        
-        return data, ValidationResult(is_valid=True, missing_fields=missing_fields)
-    
-    except ValidationError as e:
-        # Extract validation errors
-        error_path = " -> ".join(str(p) for p in e.path) if e.path else "root"
-        error_msg = f"{error_path}: {e.message}"
-        errors.append(error_msg)
-        logger.warning(f"Validation error: {error_msg}")
+        _check_missing_fields(data, missing_fields)
         
-        # Also check for missing fields
-        try:
-            schema = _load_schema()
-            _check_missing_fields(data, schema, missing_fields)
-        except Exception:
-            pass
-        
-        return data, ValidationResult(is_valid=False, errors=errors, missing_fields=missing_fields)
+        return data, ValidationResult(is_valid=not errors, errors=errors, missing_fields=missing_fields)
     
     except Exception as e:
         error_msg = f"Unexpected validation error: {str(e)}"
@@ -80,37 +67,49 @@ def validate_extracted_data(data: Dict[str, Any]) -> Tuple[Dict[str, Any], Valid
         return data, ValidationResult(is_valid=False, errors=errors)
 
 
-def _check_missing_fields(data: Dict[str, Any], schema: Dict[str, Any], missing_fields: List[str], prefix: str = ""):
+@lru_cache(maxsize=1)
+def _get_required_paths() -> Tuple[Tuple[str, ...], ...]:
+    """
+    Flatten the schema once into the paths of all required fields.
+    
+    Covers required fields at any depth, including those nested in optional objects.
+    """
+    paths = []
+    stack = [(_load_schema(), ())]
+    
+    while stack:
+        node_schema, path = stack.pop()
+        required = node_schema.get("required", ())
+        
+        for prop_name, prop_schema in node_schema.get("properties", {}).items():
+            prop_path = path + (prop_name,)
+            if prop_name in required:
+                paths.append(prop_path)
+            if "properties" in prop_schema:
+                stack.append((prop_schema, prop_path))
+    
+    # Sort so parents come before their fields
+    return tuple(sorted(paths))
+
+
+def _check_missing_fields(data: Dict[str, Any], missing_fields: List[str]):
     """
-    Recursively check for missing required fields based on the schema.
+    Check for missing required fields based on the schema.
+    
+    A field is reported when its parent object is present but the field is absent
+    or null; fields under a missing parent are covered by reporting the parent.
     
     Args:
         data: The data dictionary to check
-        schema: The JSON schema
         missing_fields: List to append missing field paths to
-        prefix: Current path prefix for nested fields
     """
-    if "properties" not in schema:
-        return
-    
-    required = schema.get("required", [])
-    
-    for prop_name, prop_schema in schema["properties"].items():
-        current_path = f"{prefix}.{prop_name}" if prefix else prop_name
+    for path in _get_required_paths():
+        parent = data
+        for key in path[:-1]:
+            parent = parent.get(key) if isinstance(parent, dict) else None
         
-        # Check if required
-        if prop_name in required:
-            if prop_name not in data or data[prop_name] is None:
-                missing_fields.append(current_path)
-        
-        # Recursively check nested objects
-        if prop_name in data and isinstance(data[prop_name], dict):
-            if "properties" in prop_schema:
-                _check_missing_fields(data[prop_name], prop_schema, missing_fields, current_path)
-            elif "type" in prop_schema and prop_schema["type"] == "object":
-                # Handle nested objects that might have properties defined elsewhere
-                if "properties" in prop_schema:
-                    _check_missing_fields(data[prop_name], prop_schema, missing_fields, current_path)
+        if isinstance(parent, dict) and parent.get(path[-1]) is None:
+            missing_fields.append(".".join(path))
 
 
 def validate_and_format(data: Dict[str, Any]) -> Tuple[Dict[str, Any], ValidationResult]:
@@ -6,6 +6,7 @@ from pathlib import Path
 from src.extractor.pdf_processor import extract_text_from_pdf
 from src.extractor.ai_extractor import AIExtractor
 from src.extractor.schema_validator import validate_and_format
+from src.extractor.response_cache import ResponseCache
 import json
 
 def test_extraction(pdf_path: str):
@@ -17,13 +18,13 @@ def test_extraction(pdf_path: str):
     try:
         # Step 1: Extract text from PDF
         print("Step 1: Extracting text from PDF...")
-        pdf_text = extract_text_from_pdf(pdf_path, use_ocr=True)
+        pdf_text = extract_text_from_pdf(pdf_path, use_ocr=True, memoize=True)
         print(f"✓ Extracted {len(pdf_text)} characters")
         print(f"  Preview: {pdf_text[:200]}...\n")
         
         # Step 2: Extract structured data using AI
         print("Step 2: Extracting structured data using AI...")
-        extractor = AIExtractor()
+        extractor = AIExtractor(cache=ResponseCache())
         extracted_data = extractor.extract(pdf_text)
         print(f"✓ AI extraction completed")
         print(f"  Extracted keys: {list(extracted_data.keys())}\n")
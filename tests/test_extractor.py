@@ -1,8 +1,15 @@
 """Tests for policy extraction functionality"""
 
+import json
+import shutil
+import tempfile
 from pathlib import Path
-from src.extractor.pdf_processor import extract_text_from_pdf
+from src.extractor import pdf_processor
+from src.extractor.pdf_processor import clean_text, extract_text_from_pdf
+from src.extractor import codegen
 from src.extractor.schema_validator import validate_extracted_data
+from src.extractor.response_cache import ResponseCache
+from src.extractor.ai_extractor import AIExtractor
 
 
 def test_pdf_text_extraction():
@@ -46,6 +53,17 @@ def test_pdf_text_extraction():
         raise
 
 
+def test_clean_text():
+    """Test that whitespace is collapsed within lines and empty lines are dropped"""
+    text = "  Policy\t  Number:  P123 \n\n   \n保單\u3000\u3000號碼 \r\nEnd"
+    expected = "Policy Number: P123\n保單 號碼\nEnd"
+    
+    if clean_text(text) != expected:
+        raise AssertionError(f"Unexpected cleaned text: {clean_text(text)!r}")
+    
+    print("✓ Clean text test passed!")
+
+
 def test_schema_validation():
     """Test schema validation with sample data"""
     # Valid sample data
@@ -99,8 +117,199 @@ def test_schema_validation():
     print("✓ Schema validation test passed!")
 
 
+def test_generated_validator_up_to_date():
+    """Test that the generated validator matches validator.json and reports errors"""
+    from src.extractor import _generated_validator
+    from src.extractor.schema_validator import _load_schema
+    
+    if codegen.OUTPUT_PATH.read_text(encoding="utf-8") != codegen.generate(_load_schema()):
+        raise AssertionError("_generated_validator.py is stale; run: python -m src.extractor.codegen")
+    
+    errors = _generated_validator.validate({"policyholder": {"name": 1, "namedDrivers": ["A", None]}})
+    expected = [
+        "policyholder -> name: must be string",
+        "policyholder -> address: is required",
+        "policyholder -> namedDrivers -> 1: must be string",
+        "vehicle: is required"
+    ]
+    for error in expected:
+        if error not in errors:
+            raise AssertionError(f"Expected validation error {error!r}, got {errors}")
+    
+    print("✓ Generated validator test passed!")
+
+
+def test_response_cache():
+    """Test that cached extraction results round-trip and keys track the prompt"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = ResponseCache(Path(tmp_dir) / "responses.sqlite3")
+        key = ResponseCache.make_key("policy text", "gpt-4o", "system prompt", "1")
+        
+        if cache.get(key) is not None:
+            raise AssertionError("Empty cache returned a result")
+        
+        data = {"policyholder": {"name": "John Doe"}}
+        cache.set(key, data)
+        
+        if cache.get(key) != data:
+            raise AssertionError("Cached result did not round-trip")
+        
+        if key == ResponseCache.make_key("policy text", "gpt-4o", "new system prompt", "1"):
+            raise AssertionError("Cache key ignores the system prompt")
+        
+        if key == ResponseCache.make_key("policy text", "gpt-4o", "system prompt", "2"):
+            raise AssertionError("Cache key ignores the version")
+        
+        # An unusable cache path disables the cache instead of failing
+        blocked_path = Path(tmp_dir) / "not-a-dir"
+        blocked_path.write_text("")
+        disabled_cache = ResponseCache(blocked_path / "responses.sqlite3")
+        disabled_cache.set(key, data)
+        
+        if disabled_cache.enabled or disabled_cache.get(key) is not None:
+            raise AssertionError("Cache with an unusable path was not disabled")
+    
+    print("✓ Response cache test passed!")
+
+
+def test_pdf_text_cache():
+    """Test that extracted text is cached on disk by PDF content"""
+    pdf_files = sorted((Path(__file__).parent.parent / "policy-docs").glob("*.pdf"))
+    if not pdf_files:
+        print("SKIP: No PDF files found in policy-docs directory")
+        return
+    
+    original_cache_dir = pdf_processor.TEXT_CACHE_DIR
+    original_extract_text_direct = pdf_processor._extract_text_direct
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_processor.TEXT_CACHE_DIR = Path(tmp_dir) / "cache"
+        try:
+            pdf_path = Path(tmp_dir) / "policy.pdf"
+            shutil.copyfile(pdf_files[0], pdf_path)
+            
+            text = extract_text_from_pdf(pdf_path, use_ocr=False)
+            cache_files = list(pdf_processor.TEXT_CACHE_DIR.glob("*.txt"))
+            
+            if len(cache_files) != 1 or cache_files[0].read_text(encoding="utf-8") != text:
+                raise AssertionError(f"Expected one cache file holding the text, found {cache_files}")
+            
+            # A copy with a different path and mtime is served from the disk cache
+            copy_path = Path(tmp_dir) / "policy-copy.pdf"
+            shutil.copyfile(pdf_path, copy_path)
+            cache_files[0].write_text("cached text", encoding="utf-8")
+            
+            if extract_text_from_pdf(copy_path, use_ocr=False) != "cached text":
+                raise AssertionError("Identical PDF was not served from the text cache")
+            
+            # Memoized results are served from memory until the file changes
+            memo_text = extract_text_from_pdf(copy_path, use_ocr=False, memoize=True)
+            cache_files[0].write_text("updated cached text", encoding="utf-8")
+            
+            if extract_text_from_pdf(copy_path, use_ocr=False, memoize=True) != memo_text:
+                raise AssertionError("Memoized text was not reused")
+            if extract_text_from_pdf(copy_path, use_ocr=False) != "updated cached text":
+                raise AssertionError("Text was memoized without memoize=True")
+            
+            # Extractions with failed pages are not cached
+            pdf_processor._extract_text_direct = lambda path: {1: "Page one text", 2: None}
+            partial_path = Path(tmp_dir) / "partial.pdf"
+            partial_path.write_bytes(b"%PDF-1.4 partial")
+            extract_text_from_pdf(partial_path, use_ocr=False)
+            
+            if len(list(pdf_processor.TEXT_CACHE_DIR.glob("*.txt"))) != 1:
+                raise AssertionError("Extraction with a failed page was cached")
+        finally:
+            pdf_processor.TEXT_CACHE_DIR = original_cache_dir
+            pdf_processor._extract_text_direct = original_extract_text_direct
+    
+    print("✓ PDF text cache test passed!")
+
+
+def test_parse_json_response():
+    """Test coercion of model output and filling of missing required fields"""
+    extractor = AIExtractor(api_key="test-key")
+    
+    data = extractor._parse_json_response(json.dumps({
+        "policyholder": {"name": "John Doe", "address": None, "namedDrivers": None},
+        "vehicle": {"yearOfManufacture": "2020", "engineNumber": None, "cubicCapacity": "1,998"},
+        "coverage": {"limitationsOnUse": "Social, domestic and pleasure purposes"},
+        "premiumAndDiscounts": {"premiumAmount": "HKD 5,000.50", "totalPayable": "$5,500",
+                                "levies": {"mib": None, "ia": "INCLUDED"}},
+        "insurerAndPolicyDetails": "REDACTED",
+        "additionalEndorsements": "N/A"
+    }))
+    
+    expected = {
+        ("policyholder", "name"): "John Doe",
+        ("policyholder", "address"): "UNKNOWN",
+        ("vehicle", "yearOfManufacture"): 2020,
+        ("vehicle", "cubicCapacity"): 1998,
+        ("coverage", "limitationsOnUse"): {"details": ["Social", "domestic and pleasure purposes"]},
+        ("premiumAndDiscounts", "premiumAmount"): 5000.5,
+        ("premiumAndDiscounts", "totalPayable"): 5500,
+        ("premiumAndDiscounts", "levies"): {"ia": "INCLUDED"},
+        ("insurerAndPolicyDetails", "policyNumber"): "UNKNOWN",
+    }
+    for (section, field), value in expected.items():
+        if data[section].get(field) != value:
+            raise AssertionError(f"{section}.{field}: expected {value!r}, got {data[section].get(field)!r}")
+    
+    for section, field in (("policyholder", "namedDrivers"), ("vehicle", "engineNumber")):
+        if field in data[section]:
+            raise AssertionError(f"Null {section}.{field} was not dropped")
+    if "additionalEndorsements" in data:
+        raise AssertionError("Scalar additionalEndorsements was not dropped")
+    
+    print("✓ JSON response parsing test passed!")
+
+
+def test_batch_extraction_matches_documents():
+    """Test that batched results are matched by document number, not position"""
+    pdf_texts = ["Policy for Alice", "Policy for Bob"]
+    
+    def entry(number, name):
+        return {"document": number, "data": {"policyholder": {"name": name}}}
+    
+    batch_replies = {
+        "reordered": [entry(2, "Bob"), entry(1, "Alice")],
+        "dropped": [entry(2, "Bob"), {"data": {"policyholder": {"name": "Alice"}}}],
+        "duplicated": [entry(2, "Bob"), entry(2, "Alice")],
+    }
+    
+    for case, entries in batch_replies.items():
+        extractor = AIExtractor(api_key="test-key")
+        single_calls = []
+        
+        def complete(prompt, document_count=1):
+            if document_count > 1:
+                return json.dumps({"documents": entries})
+            name = "Alice" if "Alice" in prompt else "Bob"
+            single_calls.append(name)
+            return json.dumps({"policyholder": {"name": name}})
+        
+        extractor._complete = complete
+        results = extractor.extract_batch(pdf_texts)
+        names = [result["policyholder"]["name"] for result in results]
+        
+        if names != ["Alice", "Bob"]:
+            raise AssertionError(f"{case}: results matched to the wrong documents: {names}")
+        if case == "reordered" and single_calls:
+            raise AssertionError("Reordered but complete batch fell back to individual extraction")
+        if case != "reordered" and sorted(single_calls) != ["Alice", "Bob"]:
+            raise AssertionError(f"{case}: batch was not re-extracted individually: {single_calls}")
+    
+    print("✓ Batch extraction matching test passed!")
+
+
 if __name__ == "__main__":
     # Run basic tests
+    test_clean_text()
+    test_generated_validator_up_to_date()
+    test_response_cache()
+    test_pdf_text_cache()
+    test_parse_json_response()
+    test_batch_extraction_matches_documents()
+    
     test_schema_validation()
     print("Schema validation test passed!")
     